@@ -134,22 +134,41 @@ class ST7789(config.RaspberryPi):
         if imwidth != self.width or imheight != self.height:
             raise ValueError('Image must be same dimensions as display \
                 ({0}x{1}).' .format(self.width, self.height))
-        img = self.np.asarray(Image)
-        pix = self.np.zeros((self.width,self.height,2), dtype = self.np.uint8)
-        pix[...,[0]] = self.np.add(self.np.bitwise_and(img[...,[0]],0xF8),self.np.right_shift(img[...,[1]],5))
-        pix[...,[1]] = self.np.add(self.np.bitwise_and(self.np.left_shift(img[...,[1]],3),0xE0),self.np.right_shift(img[...,[2]],3))
-        pix = pix.flatten().tolist()
-        self.SetWindows ( 0, 0, self.width, self.height)
+        self.ShowImage_raw(self.image_to_rgb565(Image))
+
+    def image_to_rgb565(self,Image):
+        """Pack an RGB PIL image into big-endian RGB565 bytes in one numpy pass."""
+        return self.rgb565_array(Image).astype('>u2').tobytes()
+
+    def rgb565_array(self,Image):
+        """RGB PIL image -> (h, w) uint16 array of RGB565 values"""
+        img = self.np.asarray(Image, dtype = self.np.uint16)
+        return ((img[...,0] & 0xF8) << 8) | ((img[...,1] & 0xFC) << 3) | (img[...,2] >> 3)
+
+    def ShowImage_raw(self,buf):
+        """Write width*height*2 bytes of big-endian RGB565 to the display"""
+        if len(buf) != self.width * self.height * 2:
+            raise ValueError('Buffer must be {0} bytes of RGB565.' .format(self.width * self.height * 2))
+        self.WriteWindow(buf, 0, 0, self.width, self.height)
+
+    def ShowImage_region(self,Image,Xstart,Ystart,Xend,Yend):
+        """Write a PIL image to the [Xstart,Xend) x [Ystart,Yend) window only"""
+        if Image.size != (Xend - Xstart, Yend - Ystart):
+            raise ValueError('Image must be same dimensions as the window \
+                ({0}x{1}).' .format(Xend - Xstart, Yend - Ystart))
+        self.WriteWindow(self.image_to_rgb565(Image), Xstart, Ystart, Xend, Yend)
+
+    def WriteWindow(self,buf,Xstart,Ystart,Xend,Yend):
+        """Stream RGB565 bytes into a display window"""
+        self.SetWindows(Xstart, Ystart, Xend, Yend)
         self.digital_write(self.GPIO_DC_PIN,True)
-        for i in range(0,len(pix),4096):
-            self.spi_writebyte(pix[i:i+4096])		
-        
+        self.spi_writebuffer(buf)
+
     def clear(self):
         """Clear contents of image buffer"""
-        _buffer = [0xff]*(self.width * self.height * 2)
+        _buffer = b'\xff'*(self.width * self.height * 2)
         self.SetWindows ( 0, 0, self.width, self.height)
         self.digital_write(self.GPIO_DC_PIN,True)
-        for i in range(0,len(_buffer),4096):
-            self.spi_writebyte(_buffer[i:i+4096])	        
+        self.spi_writebuffer(_buffer)	        
         
 
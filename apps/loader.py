@@ -1,10 +1,34 @@
 import importlib
+import inspect
 import logging
 
+# класс → сколько позиционных аргументов принимает __init__ (кроме self)
+_INIT_ARITY = {}
+
+
+def _init_arity(app_cls):
+    arity = _INIT_ARITY.get(app_cls)
+    if arity is None:
+        try:
+            params = list(inspect.signature(app_cls).parameters.values())
+        except (TypeError, ValueError):
+            params = []
+        positional = (inspect.Parameter.POSITIONAL_ONLY,
+                      inspect.Parameter.POSITIONAL_OR_KEYWORD)
+        if any(p.kind == inspect.Parameter.VAR_POSITIONAL for p in params):
+            arity = 3
+        else:
+            arity = sum(1 for p in params if p.kind in positional)
+        _INIT_ARITY[app_cls] = arity
+    return arity
+
+
 def load_app(module_name: str, hw, fonts, monitor):
     """
     module_name: 'system.cpu_ram' → apps/system/cpu_ram/app.py
     monitor: SystemMonitor из core.monitor
+
+    Модуль приложения обязан экспортировать класс как APP_CLASS.
     """
     try:
         mod = importlib.import_module(f"apps.{module_name}.app")
@@ -12,22 +36,16 @@ def load_app(module_name: str, hw, fonts, monitor):
         logging.warning("Failed to import app module %s: %s", module_name, e)
         return None
 
-    app_cls = None
-    for attr in dir(mod):
-        if attr.endswith("App"):
-            app_cls = getattr(mod, attr)
-            break
-
+    app_cls = getattr(mod, "APP_CLASS", None)
     if app_cls is None:
-        logging.warning("No *App class found in %s", module_name)
+        logging.warning("No APP_CLASS exported by %s", module_name)
         return None
 
-    # сначала пробуем (hw, fonts, monitor), если класс старый — падаем на (hw, fonts)
+    # (hw, fonts, monitor) или, для старых классов, (hw, fonts)
     try:
-        return app_cls(hw, fonts, monitor)
-    except TypeError:
-        try:
-            return app_cls(hw, fonts)
-        except Exception as e:
-            logging.warning("Failed to instantiate app %s: %s", module_name, e)
-            return None
+        if _init_arity(app_cls) >= 3:
+            return app_cls(hw, fonts, monitor)
+        return app_cls(hw, fonts)
+    except Exception as e:
+        logging.warning("Failed to instantiate app %s: %s", module_name, e)
+        return None
@@ -1,8 +1,136 @@
 from PIL import Image, ImageDraw
+import fcntl
+import logging
+import os
 import subprocess
-import json
+import re
+import threading
 import time
 
+from core.fonts import measure
+
+# цвета
+_BLACK = (0, 0, 0)
+_LIGHT = (200, 200, 200)
+_INFO = (180, 180, 180)
+_DIM = (150, 150, 150)
+_FRAME = (80, 80, 80)
+_LAT = (200, 255, 200)
+_LON = (200, 255, 255)
+_GREEN = (80, 220, 120)
+_YELLOW = (220, 200, 80)
+_RED = (200, 80, 80)
+_BLUE = (80, 180, 220)
+
+# TPV: вытаскиваем только числовые поля, которые показываем на экране
+_TPV_NUM_RE = re.compile(
+    rb'"(lat|lon|alt|speed|eph|epx|epy|mode)"\s*:\s*(-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)'
+)
+
+# SKY: считаем спутники прямо по сырым байтам, без разбора JSON
+_SAT_PRN = b'"PRN"'
+_USED_TRUE_RE = re.compile(rb'"used"\s*:\s*true')
+
+_TPV_TAG = b'"class":"TPV"'
+_SKY_TAG = b'"class":"SKY"'
+
+
+class _GpspipeStream:
+    """
+    Long-lived `gpspipe -w` process.
+
+    stdout is non-blocking; drain() reads whatever gpsd sent since the
+    previous call and keeps only the newest TPV and SKY lines.
+    """
+
+    MAX_PARTIAL = 65536  # drop an unterminated tail longer than this
+
+    def __init__(self):
+        self.proc = None
+        self.tpv_line = None
+        self.sky_line = None
+        self.tpv_ts = 0.0
+        self.sky_ts = 0.0
+        self._buf = b""
+
+    def open(self):
+        """Start gpspipe. Returns False if it could not be started."""
+        try:
+            self.proc = subprocess.Popen(
+                ["gpspipe", "-w"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0,
+            )
+        except Exception as e:
+            logging.warning("gpspipe start failed: %s", e)
+            self.proc = None
+            return False
+
+        fd = self.proc.stdout.fileno()
+        flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+        fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        self._buf = b""
+        return True
+
+    def drain(self):
+        """Read pending output. Returns False once gpspipe has exited."""
+        if self.proc is None:
+            return False
+
+        fd = self.proc.stdout.fileno()
+        chunks = [self._buf]
+        alive = True
+        while True:
+            try:
+                data = os.read(fd, 65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                alive = False
+                break
+            if not data:  # EOF: gpspipe exited
+                alive = False
+                break
+            chunks.append(data)
+
+        lines = b"".join(chunks).split(b"\n")
+        tail = lines.pop()
+        self._buf = tail if len(tail) <= self.MAX_PARTIAL else b""
+
+        # newest lines are at the end
+        tpv = None
+        sky = None
+        for line in reversed(lines):
+            if tpv is None and line.find(_TPV_TAG) != -1:
+                tpv = line
+            elif sky is None and line.find(_SKY_TAG) != -1:
+                sky = line
+            if tpv is not None and sky is not None:
+                break
+
+        now = time.time()
+        if tpv is not None:
+            self.tpv_line = tpv
+            self.tpv_ts = now
+        if sky is not None:
+            self.sky_line = sky
+            self.sky_ts = now
+        return alive
+
+    def close(self):
+        proc = self.proc
+        self.proc = None
+        if proc is None:
+            return
+        try:
+            proc.terminate()
+            proc.wait(timeout=1.0)
+        except Exception:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+
 
 class GpsApp:
     """
@@ -14,11 +142,15 @@ class GpsApp:
       - altitude, speed, accuracy, satellites used/seen
 
     Design:
-      - minimal use of gpspipe (short calls, small timeout)
+      - one long-lived `gpspipe -w` per visit instead of a spawn per poll
+      - gpspipe is read on a background poll thread, never on the UI loop
       - tuned to real gpspipe JSON you provided
       - any TPV with valid lat/lon is treated as a fix
     """
 
+    # fixes arrive about once a second; buttons still wake the loop at once
+    frame_interval = 0.25
+
     def __init__(self, hw, fonts, monitor):
         # hardware / screen
         self.hw = hw
@@ -41,164 +173,151 @@ class GpsApp:
         self.sats_seen = None
         self.fix_dim = None      # 2 or 3
 
-        # timing
+        # timing / poll thread
         self.sample_interval = 5.0  # seconds
+        self.stale_after = 3 * self.sample_interval  # forget TPV/SKY older than this
         self.last_sample_ts = 0.0
+        self._lock = threading.Lock()
+        self._stop_evt = None
+        self._thread = None
+
+        # render caches; everything is kept already rotated for the panel,
+        # so the frame goes to ShowImage without a full-frame rotate
+        self._bg = None             # separator + bottom hint, built on first draw()
+        self._text_masks = {}       # (text, font) -> pre-rotated "L" mask
+        self._fb = Image.new("RGB", (self.H, self.W), _BLACK)
+        self._frame_sig = None      # displayed fields of the last frame sent
 
     # ---------- helpers ----------
 
-    def _run_cmd(self, cmd, timeout=None):
-        """Run external command safely. Returns text or ''. """
-        try:
-            out = subprocess.check_output(
-                cmd,
-                stderr=subprocess.DEVNULL,
-                timeout=timeout
-            )
-            return out.decode("utf-8", errors="ignore")
-        except Exception as e:
-            print("[GPS APP] _run_cmd error:", e)
-            return ""
-    def _query_gps(self):
+    def _query_gps(self, stream):
         """
-        Single poll of gpsd via gpspipe.
+        Take one sample from the running gpspipe stream.
 
         Strategy:
-        - run: gpspipe -w -n 5 (timeout 4.0s)
-        - берем ПЕРВУЮ TPV-строку с lat/lon
+        - gpspipe -w stays running for the whole visit of the screen
+        - берем ПОСЛЕДНЮЮ TPV-строку с lat/lon
         - берем ПОСЛЕДНЮЮ SKY-строку для спутников
+          (спутники считаем по сырым байтам, без json)
+        - строки старше stale_after секунд не используются
         Любая ошибка → статус SEARCH.
-        """
-
-        # reset values for this sample
-        self.lat = None
-        self.lon = None
-        self.alt_m = None
-        self.speed_kmh = None
-        self.acc_m = None
-        self.sats_used = None
-        self.sats_seen = None
-        self.fix_dim = None
-
-        # 1) читаем небольшой кусок из gpspipe
-        out = self._run_cmd(["gpspipe", "-w", "-n", "5"], timeout=4.0)
-        if not out:
-            self.status = "SEARCH"
-            return
-
-        lines = out.splitlines()
-
-        first_tpv_line = None
-        last_sky_line = None
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
 
-            if '"class":"TPV"' in line and first_tpv_line is None:
-                first_tpv_line = line
-            elif '"class":"SKY"' in line:
-                last_sky_line = line
+        Runs on the poll thread: the sample is parsed into locals and
+        published under self._lock in one go.
+        """
+        if not stream.drain():
+            # gpspipe died (gpsd restarted etc.) — restart on next poll
+            stream.close()
 
-        # 2) TPV
-        if first_tpv_line is not None:
-            try:
-                tpv = json.loads(first_tpv_line)
-            except Exception:
-                tpv = None
-
-            if tpv is not None:
-                lat_raw = tpv.get("lat")
-                lon_raw = tpv.get("lon")
-
-                if lat_raw is not None and lon_raw is not None:
-                    try:
-                        self.lat = float(lat_raw)
-                        self.lon = float(lon_raw)
-                    except Exception:
-                        self.lat = None
-                        self.lon = None
-
-                alt_raw = tpv.get("alt")
-                try:
-                    if alt_raw is not None:
-                        self.alt_m = float(alt_raw)
-                except Exception:
-                    self.alt_m = None
-
-                speed_raw = tpv.get("speed")
-                try:
-                    if speed_raw is not None:
-                        self.speed_kmh = float(speed_raw) * 3.6
-                except Exception:
-                    self.speed_kmh = None
-
-                acc_raw = tpv.get("eph") or tpv.get("epx") or tpv.get("epy")
-                try:
-                    if acc_raw is not None:
-                        self.acc_m = float(acc_raw)
-                except Exception:
-                    self.acc_m = None
-
-                mode = None
-                mode_raw = tpv.get("mode")
-                try:
-                    if mode_raw is not None:
-                        mode = int(mode_raw)
-                except Exception:
-                    mode = None
-
-                if self.lat is not None and self.lon is not None:
-                    if mode == 3:
-                        self.fix_dim = 3
-                        self.status = "FIX_3D"
-                    else:
-                        self.fix_dim = 2
-                        self.status = "FIX_2D"
+        now = time.time()
+        tpv_line = stream.tpv_line if now - stream.tpv_ts < self.stale_after else None
+        sky_line = stream.sky_line if now - stream.sky_ts < self.stale_after else None
+        sample = self._parse_sample(tpv_line, sky_line)
+
+        with self._lock:
+            for name, value in sample.items():
+                setattr(self, name, value)
+
+    def _parse_sample(self, tpv_line, sky_line):
+        """Parse TPV / SKY lines from gpspipe -w into a dict of display fields."""
+        sample = {
+            "status": "SEARCH",
+            "lat": None,
+            "lon": None,
+            "alt_m": None,
+            "speed_kmh": None,
+            "acc_m": None,
+            "sats_used": None,
+            "sats_seen": None,
+            "fix_dim": None,
+        }
+
+        # 2) TPV: нужны только несколько числовых полей, поэтому без json.loads
+        if tpv_line is not None:
+            tpv = {}
+            for m in _TPV_NUM_RE.finditer(tpv_line):
+                # регулярка пропускает только числа, float() тут не падает
+                tpv.setdefault(m.group(1), float(m.group(2)))
+
+            lat = tpv.get(b"lat")
+            lon = tpv.get(b"lon")
+
+            alt = tpv.get(b"alt")
+            if alt is not None:
+                sample["alt_m"] = alt
+
+            speed = tpv.get(b"speed")
+            if speed is not None:
+                sample["speed_kmh"] = speed * 3.6
+
+            acc = tpv.get(b"eph") or tpv.get(b"epx") or tpv.get(b"epy")
+            if acc is not None:
+                sample["acc_m"] = acc
+
+            mode = tpv.get(b"mode")
+
+            if lat is not None and lon is not None:
+                sample["lat"] = lat
+                sample["lon"] = lon
+                if mode == 3:
+                    sample["fix_dim"] = 3
+                    sample["status"] = "FIX_3D"
                 else:
-                    self.status = "SEARCH"
-        else:
-            self.status = "SEARCH"
+                    sample["fix_dim"] = 2
+                    sample["status"] = "FIX_2D"
 
         # 3) SKY
-        if last_sky_line is not None:
-            try:
-                sky = json.loads(last_sky_line)
-            except Exception:
-                sky = None
-
-            if sky is not None:
-                sats = sky.get("satellites") or []
-                used = 0
-                seen = 0
-                for sat in sats:
-                    try:
-                        seen += 1
-                        if sat.get("used"):
-                            used += 1
-                    except Exception:
-                        continue
-                self.sats_used = used
-                self.sats_seen = seen
+        if sky_line is not None:
+            sample["sats_seen"] = sky_line.count(_SAT_PRN)
+            sample["sats_used"] = len(_USED_TRUE_RE.findall(sky_line))
+
+        return sample
+
+    def _poll_loop(self, stop_evt):
+        """Poll thread: sample gpspipe every sample_interval until stopped."""
+        stream = _GpspipeStream()
+        try:
+            while not stop_evt.is_set():
+                if stream.proc is None and stream.open():
+                    # give gpspipe a moment to deliver the first lines
+                    stop_evt.wait(1.0)
+                self._query_gps(stream)
+                self.last_sample_ts = time.time()
+                stop_evt.wait(self.sample_interval)
+        finally:
+            stream.close()
 
     # ---------- lifecycle ----------
 
     def on_enter(self):
         """Called when entering the app."""
-        self.status = "SEARCH"
-        self.lat = None
-        self.lon = None
-        self.alt_m = None
-        self.speed_kmh = None
-        self.acc_m = None
-        self.sats_used = None
-        self.sats_seen = None
-        self.fix_dim = None
+        with self._lock:
+            self.status = "SEARCH"
+            self.lat = None
+            self.lon = None
+            self.alt_m = None
+            self.speed_kmh = None
+            self.acc_m = None
+            self.sats_used = None
+            self.sats_seen = None
+            self.fix_dim = None
         self.last_sample_ts = 0.0
-
-        # first data immediately
-        self._query_gps()
+        self._frame_sig = None
+
+        # gpspipe can block for seconds, so it never runs on the UI loop;
+        # the thread takes the first sample immediately
+        self._stop_evt = threading.Event()
+        self._thread = threading.Thread(
+            target=self._poll_loop, args=(self._stop_evt,), daemon=True
+        )
+        self._thread.start()
+
+    def on_exit(self):
+        """Called when leaving the app: stop the poll thread."""
+        if self._stop_evt is not None:
+            self._stop_evt.set()
+            self._stop_evt = None
+        self._thread = None
 
     def on_event(self, event):
         """
@@ -210,22 +329,11 @@ class GpsApp:
         return "stay"
 
     def update(self, dt):
-        """
-        Periodically poll gpspipe and update internal data.
-        """
-        now = time.time()
-        if (now - self.last_sample_ts) < self.sample_interval:
-            return
-
-        self.last_sample_ts = now
-        self._query_gps()
+        """Nothing to do here: data comes from the poll thread."""
+        pass
 
     # ---------- drawing ----------
 
-    def _text_size(self, draw, text, font):
-        bbox = draw.textbbox((0, 0), text, font=font)
-        return bbox[2] - bbox[0], bbox[3] - bbox[1]
-
     def _format_latlon(self, value, is_lat=True):
         """
         Format lat/lon as 37.12345° N / 122.12345° W.
@@ -266,28 +374,83 @@ class GpsApp:
         Returns (text, color) for the status line.
         """
         if self.status == "NO_GPS":
-            return "NO MODULE", (200, 80, 80)
+            return "NO MODULE", _RED
         if self.status == "SEARCH":
-            return "SEARCHING...", (220, 200, 80)
+            return "SEARCHING...", _YELLOW
         if self.status == "FIX_3D":
-            return "3D FIX", (80, 220, 120)
+            return "3D FIX", _GREEN
         if self.status == "FIX_2D":
-            return "2D FIX", (80, 180, 220)
+            return "2D FIX", _BLUE
         # fallback: unknown status → show as SEARCH
-        return "SEARCHING...", (220, 200, 80)
+        return "SEARCHING...", _YELLOW
+    def _build_bg(self):
+        """Static part of the screen: separator and bottom hint (pre-rotated)."""
+        img = Image.new("RGB", (self.W, self.H), _BLACK)
+        draw = ImageDraw.Draw(img)
+
+        # horizontal separator
+        draw.line([(0, 24), (self.W, 24)], fill=_FRAME, width=1)
+
+        # bottom hint (always at the very bottom zone)
+        hint = "KEY3: Back"
+        hw, hh = measure(hint, self.font_label)
+        draw.text(((self.W - hw) // 2, self.H - hh - 2),
+                  hint, font=self.font_label, fill=_DIM)
+        return img.transpose(Image.ROTATE_270)
+
+    def _text_mask(self, text, font):
+        """
+        Returns the text as a pre-rotated "L" mask; it is rendered
+        only once per (text, font) and then just pasted.
+        """
+        key = (text, font)
+        mask = self._text_masks.get(key)
+        if mask is None:
+            if len(self._text_masks) >= 64:
+                # coordinates / speed change all the time — don't grow forever
+                self._text_masks.clear()
+            bbox = font.getbbox(text)
+            tile = Image.new("L", (max(1, bbox[2]), max(1, bbox[3])), 0)
+            ImageDraw.Draw(tile).text((0, 0), text, font=font, fill=255)
+            mask = tile.transpose(Image.ROTATE_270)
+            self._text_masks[key] = mask
+        return mask
+
+    def _put_text(self, xy, text, font, fill):
+        """Same as draw.text(xy, ...) in screen coordinates, but on the rotated framebuffer."""
+        x, y = xy
+        mask = self._text_mask(text, font)
+        # screen (x, y) of a w×h box → (H - y - h, x) after rotating by 270°
+        self._fb.paste(fill, (self.H - y - mask.width, x), mask)
+
     def draw(self):
         """Draw GPS screen."""
-        img = Image.new("RGB", (self.W, self.H), (0, 0, 0))
-        draw = ImageDraw.Draw(img)
+        # the poll thread publishes a whole sample under the lock,
+        # so the frame is composed from one consistent snapshot
+        with self._lock:
+            sig = (self.status, self.lat, self.lon, self.alt_m, self.speed_kmh,
+                   self.acc_m, self.sats_used, self.sats_seen)
+            if sig == self._frame_sig:
+                # nothing on screen would change — skip render and SPI push
+                return
+            self._frame_sig = sig
+            img = self._compose()
+
+        # the framebuffer is already in panel orientation
+        self.hw.show_panel(img)
+
+    def _compose(self):
+        """Render the current state into the framebuffer and return it."""
+        if self._bg is None:
+            self._bg = self._build_bg()
+        img = self._fb
+        img.paste(self._bg)
 
         # status line at top
         status_text, status_color = self._status_text_and_color()
-        st_w, st_h = self._text_size(draw, status_text, self.font_label)
-        draw.text(((self.W - st_w) // 2, 4),
-                  status_text, font=self.font_label, fill=status_color)
-
-        # horizontal separator
-        draw.line([(0, 24), (self.W, 24)], fill=(80, 80, 80), width=1)
+        sw, _ = measure(status_text, self.font_label)
+        self._put_text(((self.W - sw) // 2, 4),
+                       status_text, self.font_label, status_color)
 
         center_y = self.H // 2
 
@@ -297,32 +460,32 @@ class GpsApp:
                 if self.status == "NO_GPS"
                 else "Searching satellites..."
             )
-            color = (200, 200, 200) if self.status == "NO_GPS" else (220, 200, 80)
-            mw, mh = self._text_size(draw, msg, self.font_label)
-            draw.text(((self.W - mw) // 2, center_y - mh // 2),
-                      msg, font=self.font_label, fill=color)
+            color = _LIGHT if self.status == "NO_GPS" else _YELLOW
+            mw, mh = measure(msg, self.font_label)
+            self._put_text(((self.W - mw) // 2, center_y - mh // 2),
+                           msg, self.font_label, color)
 
             if self.sats_seen is not None:
                 sat_msg = f"{self.sats_seen} satellites visible"
-                sw, sh = self._text_size(draw, sat_msg, self.font_label)
-                draw.text(((self.W - sw) // 2, center_y + mh),
-                          sat_msg, font=self.font_label, fill=(150, 150, 150))
+                sw, sh = measure(sat_msg, self.font_label)
+                self._put_text(((self.W - sw) // 2, center_y + mh),
+                               sat_msg, self.font_label, _DIM)
 
         else:
             # FIX_2D or FIX_3D
             lat_str = self._format_latlon(self.lat, is_lat=True)
             lon_str = self._format_latlon(self.lon, is_lat=False)
 
-            lat_w, lat_h = self._text_size(draw, lat_str, self.font_small)
-            lon_w, lon_h = self._text_size(draw, lon_str, self.font_small)
+            lat_w, lat_h = measure(lat_str, self.font_small)
+            lon_w, lon_h = measure(lon_str, self.font_small)
 
             y_lat = center_y - lat_h - 4
             y_lon = center_y + 4
 
-            draw.text(((self.W - lat_w) // 2, y_lat),
-                      lat_str, font=self.font_small, fill=(200, 255, 200))
-            draw.text(((self.W - lon_w) // 2, y_lon),
-                      lon_str, font=self.font_small, fill=(200, 255, 255))
+            self._put_text(((self.W - lat_w) // 2, y_lat),
+                           lat_str, self.font_small, _LAT)
+            self._put_text(((self.W - lon_w) // 2, y_lon),
+                           lon_str, self.font_small, _LON)
 
             # bottom info block: Alt / Spd / Acc / Sat
             alt_str = self._format_alt()
@@ -340,16 +503,11 @@ class GpsApp:
             y_start = center_y + 30
 
             for i, txt in enumerate(info_lines):
-                tw, th = self._text_size(draw, txt, self.font_label)
-                draw.text(((self.W - tw) // 2, y_start + i * line_h),
-                          txt, font=self.font_label, fill=(180, 180, 180))
+                tw, th = measure(txt, self.font_label)
+                self._put_text(((self.W - tw) // 2, y_start + i * line_h),
+                               txt, self.font_label, _INFO)
+
+        return img
 
-        # bottom hint (always at the very bottom zone)
-        hint = "KEY3: Back"
-        hw, hh = self._text_size(draw, hint, self.font_label)
-        draw.text(((self.W - hw) // 2, self.H - hh - 2),
-                  hint, font=self.font_label, fill=(150, 150, 150))
 
-        # rotate and show
-        im_r = img.rotate(270)
-        self.disp.ShowImage(im_r)
+APP_CLASS = GpsApp
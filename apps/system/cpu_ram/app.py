@@ -1,20 +1,56 @@
+import numpy as np
 from PIL import Image, ImageDraw
 
+from core.fonts import measure, paste_text
+
+# цвета
+_BLACK = (0, 0, 0)
+_WHITE = (255, 255, 255)
+_LIGHT = (200, 200, 200)
+_DIM = (150, 150, 150)
+_FRAME = (80, 80, 80)
+_GRID = (60, 60, 60)
+_LINE = (120, 200, 250)
+_GREEN = (80, 200, 80)
+_BLUE = (80, 80, 200)
+
 class CpuRamApp:
+    # замеры раз в секунду; кнопки будят главный цикл сразу
+    frame_interval = 0.25
+
     def __init__(self, hw, fonts, monitor):
         self.hw = hw
         self.font_big, self.font_small, self.font_label = fonts
         self.monitor = monitor  # общий монитор
+        self._bg = None  # статичный фон (заголовок + подсказка), строится в draw()
+        self._hint_y = 0
+        # один кадр на всё время жизни приложения, каждый draw() начинается с фона
+        self._fb = Image.new("RGB", (hw.W, hw.H), _BLACK)
+        self._fb_draw = ImageDraw.Draw(self._fb)
+        self._frame_sig = None  # по каким данным нарисован последний показанный кадр
+        self._block_sigs = None  # блок → его данные на экране; None = нужен полный кадр
+
+    def _build_bg(self, W, H):
+        """Рисует один раз статичную часть экрана: заголовок, разделитель, подсказку."""
+        img = Image.new("RGB", (W, H), _BLACK)
+        draw = ImageDraw.Draw(img)
 
-    def _text_size(self, draw, text, font):
-        bbox = draw.textbbox((0, 0), text, font=font)
-        w = bbox[2] - bbox[0]
-        h = bbox[3] - bbox[1]
-        return w, h
+        title = "CPU / RAM"
+        tw, th = measure(title, self.font_label)
+        draw.text(((W - tw)//2, 2), title, font=self.font_label, fill=_LIGHT)
+        draw.line([(0,18),(W,18)], fill=_FRAME, width=1)
+
+        hint = "KEY3: back"
+        hw_hint, hh_hint = measure(hint, self.font_label)
+        self._hint_y = H - hh_hint - 4
+        draw.text(((W - hw_hint)//2, self._hint_y),
+                  hint, font=self.font_label, fill=_DIM)
+        return img
 
     def on_enter(self):
-        # ничего не сбрасываем — история хранится в monitor
-        pass
+        # историю не сбрасываем — она хранится в monitor; кадр рисуем заново
+        self._frame_sig = None
+        self._block_sigs = None
 
     def on_event(self, event):
         if event == "KEY3":
@@ -26,25 +62,29 @@ class CpuRamApp:
         pass
 
     def draw(self):
+        # все значения и история меняются только при новой выборке monitor,
+        # а между выборками на экране уже ровно этот кадр
+        sig = self.monitor.last_sample
+        if sig == self._frame_sig:
+            return
+        self._frame_sig = sig
+
         W, H = self.hw.W, self.hw.H
-        img = Image.new("RGB", (W, H), (0, 0, 0))
-        draw = ImageDraw.Draw(img)
+        if self._bg is None:
+            self._bg = self._build_bg(W, H)
+        img = self._fb
+        img.paste(self._bg)
+        draw = self._fb_draw
 
         cpu = self.monitor.cpu_percent
         mem_used = self.monitor.mem_used
         mem_total = self.monitor.mem_total
         hist = self.monitor.cpu_history
 
-        # ---------- заголовок ----------
-        title = "CPU / RAM"
-        tw, th = self._text_size(draw, title, self.font_label)
-        draw.text(((W - tw)//2, 2), title, font=self.font_label, fill=(200,200,200))
-        draw.line([(0,18),(W,18)], fill=(80,80,80), width=1)
-
         # ---------- CPU + бар ----------
         cpu_str = f"CPU: {cpu:4.1f}%"
-        cw, ch = self._text_size(draw, cpu_str, self.font_label)
-        draw.text((4, 22), cpu_str, font=self.font_label, fill=(255,255,255))
+        cw, ch = measure(cpu_str, self.font_label)
+        draw.text((4, 22), cpu_str, font=self.font_label, fill=_WHITE)
 
         bar_x = 4
         bar_y = 22 + ch + 4
@@ -52,22 +92,22 @@ class CpuRamApp:
         bar_h = 10
 
         draw.rectangle([bar_x, bar_y, bar_x+bar_w, bar_y+bar_h],
-                       outline=(80,80,80), width=1)
+                       outline=_FRAME, width=1)
         fill_w = int(bar_w * (cpu / 100.0))
         if fill_w > 0:
             draw.rectangle([bar_x+1, bar_y+1,
                             bar_x+fill_w-1, bar_y+bar_h-1],
-                           fill=(80,200,80))
+                           fill=_GREEN)
 
         # ---------- RAM + бар ----------
         ram_str = f"RAM: {mem_used} / {mem_total} MiB"
-        rw, rh = self._text_size(draw, ram_str, self.font_label)
+        rw, rh = measure(ram_str, self.font_label)
         draw.text((4, bar_y + bar_h + 6),
-                  ram_str, font=self.font_label, fill=(255,255,255))
+                  ram_str, font=self.font_label, fill=_WHITE)
 
         rbar_y = bar_y + bar_h + 6 + rh + 4
         draw.rectangle([bar_x, rbar_y, bar_x+bar_w, rbar_y+bar_h],
-                       outline=(80,80,80), width=1)
+                       outline=_FRAME, width=1)
         if mem_total > 0:
             rfill_w = int(bar_w * (mem_used / mem_total))
         else:
@@ -75,12 +115,10 @@ class CpuRamApp:
         if rfill_w > 0:
             draw.rectangle([bar_x+1, rbar_y+1,
                             bar_x+rfill_w-1, rbar_y+bar_h-1],
-                           fill=(80,80,200))
+                           fill=_BLUE)
 
         # ---------- График CPU с минимальными/максимальными метками ----------
-        hint = "KEY3: back"
-        hw_hint, hh_hint = self._text_size(draw, hint, self.font_label)
-        bottom_hint_y = H - hh_hint - 4
+        bottom_hint_y = self._hint_y
 
         graph_top = rbar_y + bar_h + 8
         graph_bottom = bottom_hint_y - 8
@@ -93,40 +131,46 @@ class CpuRamApp:
 
             # рамка
             draw.rectangle([graph_x0, graph_top, graph_x1, graph_bottom],
-                           outline=(60,60,60), width=1)
+                           outline=_GRID, width=1)
 
-            vals = hist
-            vmin = min(vals)
-            vmax = max(vals)
+            vals = np.asarray(hist.values(), dtype=float)  # целые проценты из кольцевого буфера
+            vmin = float(vals.min())
+            vmax = float(vals.max())
             if vmax == vmin:
                 vmax = vmin + 1.0
 
-            # подписи по оси Y (min / max)
+            # подписи по оси Y (min / max) — готовые маски, без FreeType на каждый кадр
             top_label = f"{int(vmax)}%"
             bot_label = f"{int(vmin)}%"
-            tlw, tlh = self._text_size(draw, top_label, self.font_label)
-            blw, blh = self._text_size(draw, bot_label, self.font_label)
-            draw.text((2, graph_top - tlh//2),
-                      top_label, font=self.font_label, fill=(150,150,150))
-            draw.text((2, graph_bottom - blh//2),
-                      bot_label, font=self.font_label, fill=(150,150,150))
-
-            # сама линия
+            tlw, tlh = measure(top_label, self.font_label)
+            blw, blh = measure(bot_label, self.font_label)
+            paste_text(img, (2, graph_top - tlh//2), top_label, self.font_label, _DIM)
+            paste_text(img, (2, graph_bottom - blh//2), bot_label, self.font_label, _DIM)
+
+            # сама линия — одной полилинией, координаты считает numpy
             n = len(vals)
             step_x = graph_w / max(1, n - 1)
-            points = []
-            for i, v in enumerate(vals):
-                x = graph_x0 + i * step_x
-                ratio = (v - vmin) / (vmax - vmin)
-                y = graph_bottom - ratio * graph_h
-                points.append((x, y))
-
-            for i in range(1, len(points)):
-                draw.line([points[i-1], points[i]],
-                          fill=(120,200,250), width=1)
-
-        # ---------- подсказка ----------
-        draw.text(((W - hw_hint)//2, bottom_hint_y),
-                  hint, font=self.font_label, fill=(150,150,150))
-
-        self.hw.show(img)
+            xs = graph_x0 + np.arange(n) * step_x
+            ys = graph_bottom - (vals - vmin) / (vmax - vmin) * graph_h
+            draw.line(list(zip(xs.tolist(), ys.tolist())),
+                      fill=_LINE, width=1)
+
+        # ---------- отправка на экран ----------
+        # полный кадр только после входа, дальше по SPI уходят лишь те блоки,
+        # чьи данные поменялись (график пересчитывает масштаб на каждой выборке)
+        blocks = (
+            ("cpu", (cpu_str, fill_w), (0, 19, W, bar_y + bar_h + 1)),
+            ("ram", (ram_str, rfill_w), (0, bar_y + bar_h + 1, W, rbar_y + bar_h + 1)),
+            ("graph", sig, (0, rbar_y + bar_h + 1, W, bottom_hint_y + 4)),
+        )
+        if self._block_sigs is None:
+            self._block_sigs = {name: data for name, data, _ in blocks}
+            self.hw.show(img)
+            return
+        for name, data, box in blocks:
+            if self._block_sigs[name] != data:
+                self._block_sigs[name] = data
+                self.hw.show_region(img, box)
+
+
+APP_CLASS = CpuRamApp
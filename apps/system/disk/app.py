@@ -1,7 +1,23 @@
-import shutil
+import os
 from PIL import Image, ImageDraw
 
+from core.fonts import measure
+
+# цвета
+_BLACK = (0, 0, 0)
+_WHITE = (255, 255, 255)
+_LIGHT = (200, 200, 200)
+_DIM = (150, 150, 150)
+_FRAME = (80, 80, 80)
+_GRID = (60, 60, 60)
+_GREEN = (80, 200, 80)
+_YELLOW = (220, 180, 60)
+_RED = (220, 80, 80)
+
 class DiskApp:
+    # цифры меняются раз в 5 с; кнопки будят главный цикл сразу
+    frame_interval = 1.0
+
     def __init__(self, hw, fonts, monitor=None):
         # monitor не используем, но принимаем для совместимости
         self.hw = hw
@@ -12,35 +28,75 @@ class DiskApp:
         self.used_gb = 0.0
         self.free_gb = 0.0
         self.used_pct = 0.0
+        self._last_sig = None   # (used, free, total) в байтах от прошлого чтения
+        self._used_str = ""
+        self._free_str = ""
+        self._pct_str = ""
+
+        self._bg = None  # статичный фон (заголовок + подсказка), строится в draw()
+        self._hint_y = 0
+        # один кадр на всё время жизни приложения, каждый draw() начинается с фона
+        self._fb = Image.new("RGB", (hw.W, hw.H), _BLACK)
+        self._fb_draw = ImageDraw.Draw(self._fb)
+        self._ticks = None  # маска делений 25/50/75% для бара, строится в draw()
+        self._frame_sig = None  # по каким данным нарисован последний показанный кадр
+
+    def _build_bg(self, W, H):
+        """Рисует один раз статичную часть экрана: заголовок, разделитель, подсказку."""
+        img = Image.new("RGB", (W, H), _BLACK)
+        draw = ImageDraw.Draw(img)
+
+        title = "Disk usage"
+        tw, th = measure(title, self.font_label)
+        draw.text(((W - tw)//2, 2), title, font=self.font_label, fill=_LIGHT)
+        draw.line([(0,18),(W,18)], fill=_FRAME, width=1)
 
-    def _text_size(self, draw, text, font):
-        bbox = draw.textbbox((0, 0), text, font=font)
-        w = bbox[2] - bbox[0]
-        h = bbox[3] - bbox[1]
-        return w, h
+        hint = "KEY3: back"
+        hw_hint, hh_hint = measure(hint, self.font_label)
+        self._hint_y = H - hh_hint - 4
+        draw.text(((W - hw_hint)//2, self._hint_y),
+                  hint, font=self.font_label, fill=_DIM)
+        return img
+
+    def _build_ticks(self, bar_w, bar_h):
+        """Маска трёх делений по бару — рисуется один раз, потом только paste."""
+        mask = Image.new("L", (bar_w + 1, bar_h + 1), 0)
+        draw = ImageDraw.Draw(mask)
+        for frac in (0.25, 0.5, 0.75):
+            x = int(bar_w * frac)
+            draw.line([(x, 0), (x, bar_h)], fill=255, width=1)
+        return mask
 
     def _read_disk(self):
         """Читаем использование корневого раздела /."""
         try:
-            usage = shutil.disk_usage("/")
-            total = usage.total
-            used = usage.used
-            free = usage.free
-
-            self.total_gb = total / (1024**3)
-            self.used_gb = used / (1024**3)
-            self.free_gb = free / (1024**3)
-            if total > 0:
-                self.used_pct = used * 100.0 / total
-            else:
-                self.used_pct = 0.0
+            st = os.statvfs("/")
+            total = st.f_frsize * st.f_blocks
+            free = st.f_frsize * st.f_bavail
+            used = total - st.f_frsize * st.f_bfree
         except Exception:
-            self.total_gb = 0.0
-            self.used_gb = 0.0
-            self.free_gb = 0.0
+            total = used = free = 0
+
+        # ничего не поменялось — пересчитывать и форматировать нечего
+        sig = (used, free, total)
+        if sig == self._last_sig:
+            return
+        self._last_sig = sig
+
+        self.total_gb = total / (1024**3)
+        self.used_gb = used / (1024**3)
+        self.free_gb = free / (1024**3)
+        if total > 0:
+            self.used_pct = used * 100.0 / total
+        else:
             self.used_pct = 0.0
 
+        self._used_str = f"Used: {self.used_gb:4.1f} / {self.total_gb:4.1f} GiB"
+        self._free_str = f"Free: {self.free_gb:4.1f} GiB ({100.0 - self.used_pct:3.0f}%)"
+        self._pct_str = f"{self.used_pct:4.1f}%"
+
     def on_enter(self):
+        self._frame_sig = None
         self._read_disk()
 
     def on_event(self, event):
@@ -56,31 +112,33 @@ class DiskApp:
             self.last_update = 0.0
 
     def draw(self):
-        W, H = self.hw.W, self.hw.H
-        img = Image.new("RGB", (W, H), (0, 0, 0))
-        draw = ImageDraw.Draw(img)
+        # _last_sig меняется только когда _read_disk увидел другие цифры
+        sig = self._last_sig
+        if sig == self._frame_sig:
+            return
+        self._frame_sig = sig
 
-        # ---------- Заголовок ----------
-        title = "Disk usage"
-        tw, th = self._text_size(draw, title, self.font_label)
-        draw.text(((W - tw)//2, 2),
-                  title, font=self.font_label, fill=(200,200,200))
-        draw.line([(0,18),(W,18)], fill=(80,80,80), width=1)
+        W, H = self.hw.W, self.hw.H
+        if self._bg is None:
+            self._bg = self._build_bg(W, H)
+        img = self._fb
+        img.paste(self._bg)
+        draw = self._fb_draw
 
         # ---------- Основные цифры ----------
         # Строка: "Used: 12.3 / 28.6 GiB"
-        used_str = f"Used: {self.used_gb:4.1f} / {self.total_gb:4.1f} GiB"
-        uw, uh = self._text_size(draw, used_str, self.font_label)
+        used_str = self._used_str
+        uw, uh = measure(used_str, self.font_label)
         y0 = 22
         draw.text(((W - uw)//2, y0),
-                  used_str, font=self.font_label, fill=(255,255,255))
+                  used_str, font=self.font_label, fill=_WHITE)
 
         # Строка: "Free: 16.3 GiB (57%)"
-        free_str = f"Free: {self.free_gb:4.1f} GiB ({100.0 - self.used_pct:3.0f}%)"
-        fw, fh = self._text_size(draw, free_str, self.font_label)
+        free_str = self._free_str
+        fw, fh = measure(free_str, self.font_label)
         y1 = y0 + uh + 2
         draw.text(((W - fw)//2, y1),
-                  free_str, font=self.font_label, fill=(200,200,200))
+                  free_str, font=self.font_label, fill=_LIGHT)
 
         # ---------- Большой бар ----------
         bar_x = 10
@@ -90,16 +148,16 @@ class DiskApp:
 
         # рамка
         draw.rectangle([bar_x, bar_y, bar_x+bar_w, bar_y+bar_h],
-                       outline=(80,80,80), width=1)
+                       outline=_FRAME, width=1)
 
         # used (красный/жёлтый/зелёный в зависимости от заполнения)
         pct = self.used_pct
         if pct < 60:
-            fill_color = (80, 200, 80)     # зелёный
+            fill_color = _GREEN     # зелёный
         elif pct < 85:
-            fill_color = (220, 180, 60)   # жёлтый
+            fill_color = _YELLOW   # жёлтый
         else:
-            fill_color = (220, 80, 80)    # красный
+            fill_color = _RED    # красный
 
         fill_w = int(bar_w * (pct / 100.0))
         if fill_w > 0:
@@ -108,22 +166,17 @@ class DiskApp:
                            fill=fill_color)
 
         # подпись процента поверх бара
-        pct_str = f"{pct:4.1f}%"
-        pw, ph = self._text_size(draw, pct_str, self.font_label)
+        pct_str = self._pct_str
+        pw, ph = measure(pct_str, self.font_label)
         draw.text((bar_x + (bar_w - pw)//2, bar_y + (bar_h - ph)//2),
-                  pct_str, font=self.font_label, fill=(0,0,0))
+                  pct_str, font=self.font_label, fill=_BLACK)
 
         # ---------- Мелкие деления по бару (25, 50, 75%) ----------
-        for frac in (0.25, 0.5, 0.75):
-            x = bar_x + int(bar_w * frac)
-            draw.line([(x, bar_y), (x, bar_y + bar_h)],
-                      fill=(60,60,60), width=1)
-
-        # ---------- Подсказка ----------
-        hint = "KEY3: back"
-        hw_hint, hh_hint = self._text_size(draw, hint, self.font_label)
-        bottom_hint_y = H - hh_hint - 4
-        draw.text(((W - hw_hint)//2, bottom_hint_y),
-                  hint, font=self.font_label, fill=(150,150,150))
+        if self._ticks is None:
+            self._ticks = self._build_ticks(bar_w, bar_h)
+        img.paste(_GRID, (bar_x, bar_y), self._ticks)
 
         self.hw.show(img)
+
+
+APP_CLASS = DiskApp
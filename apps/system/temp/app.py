@@ -1,20 +1,64 @@
+import numpy as np
 from PIL import Image, ImageDraw
 
+from core.fonts import measure, paste_text
+
+# цвета
+_BLACK = (0, 0, 0)
+_WHITE = (255, 255, 255)
+_LIGHT = (200, 200, 200)
+_INFO = (180, 180, 180)
+_DIM = (150, 150, 150)
+_FRAME = (80, 80, 80)
+_GRID = (60, 60, 60)
+_LINE = (120, 200, 250)
+_GREEN = (80, 200, 80)
+_YELLOW = (220, 180, 60)
+_RED = (220, 80, 80)
+
+# статус и цвет заливки для каждого целого градуса 0..90
+_TEMP_LUT = tuple(
+    ("Cool", _GREEN) if t < 50
+    else ("Warm", _YELLOW) if t < 70
+    else ("Hot!", _RED)
+    for t in range(91)
+)
+
 class TempApp:
+    # замеры раз в секунду; кнопки будят главный цикл сразу
+    frame_interval = 0.25
+
     def __init__(self, hw, fonts, monitor):
         self.hw = hw
         self.font_big, self.font_small, self.font_label = fonts
         self.monitor = monitor
+        self._bg = None  # статичный фон (заголовок + подсказка), строится в draw()
+        self._hint_y = 0
+        # один кадр на всё время жизни приложения, каждый draw() начинается с фона
+        self._fb = Image.new("RGB", (hw.W, hw.H), _BLACK)
+        self._fb_draw = ImageDraw.Draw(self._fb)
+        self._frame_sig = None  # по каким данным нарисован последний показанный кадр
+
+    def _build_bg(self, W, H):
+        """Рисует один раз статичную часть экрана: заголовок, разделитель, подсказку."""
+        img = Image.new("RGB", (W, H), _BLACK)
+        draw = ImageDraw.Draw(img)
+
+        title = "Temperature"
+        tw, th = measure(title, self.font_label)
+        draw.text(((W - tw)//2, 2), title, font=self.font_label, fill=_LIGHT)
+        draw.line([(0,18),(W,18)], fill=_FRAME, width=1)
 
-    def _text_size(self, draw, text, font):
-        bbox = draw.textbbox((0, 0), text, font=font)
-        w = bbox[2] - bbox[0]
-        h = bbox[3] - bbox[1]
-        return w, h
+        hint = "KEY3: back"
+        hw_hint, hh_hint = measure(hint, self.font_label)
+        self._hint_y = H - hh_hint - 4
+        draw.text(((W - hw_hint)//2, self._hint_y),
+                  hint, font=self.font_label, fill=_DIM)
+        return img
 
     def on_enter(self):
-        # историю не трогаем
-        pass
+        # историю не трогаем; кадр рисуем заново
+        self._frame_sig = None
 
     def on_event(self, event):
         if event == "KEY3":
@@ -26,49 +70,41 @@ class TempApp:
         pass
 
     def draw(self):
+        # температура и история меняются только при новом замере температуры,
+        # а между замерами на экране уже ровно этот кадр
+        sig = self.monitor.last_temp_sample
+        if sig == self._frame_sig:
+            return
+        self._frame_sig = sig
+
         W, H = self.hw.W, self.hw.H
-        img = Image.new("RGB", (W, H), (0, 0, 0))
-        draw = ImageDraw.Draw(img)
+        if self._bg is None:
+            self._bg = self._build_bg(W, H)
+        img = self._fb
+        img.paste(self._bg)
+        draw = self._fb_draw
 
         temp = self.monitor.temp_c
         hist = self.monitor.temp_history
 
-        # статус по температуре
-        if temp < 50:
-            status = "Cool"
-            fill_color = (80, 200, 80)
-        elif temp < 70:
-            status = "Warm"
-            fill_color = (220, 180, 60)
-        else:
-            status = "Hot!"
-            fill_color = (220, 80, 80)
-
-        # ---------- заголовок ----------
-        title = "Temperature"
-        tw, th = self._text_size(draw, title, self.font_label)
-        draw.text(((W - tw)//2, 2), title, font=self.font_label, fill=(200,200,200))
-        draw.line([(0,18),(W,18)], fill=(80,80,80), width=1)
+        # статус по температуре (таблица по целым градусам)
+        status, fill_color = _TEMP_LUT[max(0, min(90, int(temp)))]
 
         # ---------- крупное значение ----------
         temp_str = f"{temp:4.1f}°C"
-        t_w, t_h = self._text_size(draw, temp_str, self.font_big)
+        t_w, t_h = measure(temp_str, self.font_big)
         temp_y = 22
         draw.text(((W - t_w)//2, temp_y),
-                  temp_str, font=self.font_big, fill=(255,255,255))
+                  temp_str, font=self.font_big, fill=_WHITE)
 
         # ---------- статус ----------
-        s_w, s_h = self._text_size(draw, status, self.font_label)
+        s_w, s_h = measure(status, self.font_label)
         status_y = temp_y + t_h + 4
         draw.text(((W - s_w)//2, status_y),
-                  status, font=self.font_label, fill=(180,180,180))
+                  status, font=self.font_label, fill=_INFO)
 
-        # ---------- подсказка снизу ----------
-        hint = "KEY3: back"
-        hw_hint, hh_hint = self._text_size(draw, hint, self.font_label)
-        bottom_hint_y = H - hh_hint - 4
-        draw.text(((W - hw_hint)//2, bottom_hint_y),
-                  hint, font=self.font_label, fill=(150,150,150))
+        # ---------- подсказка снизу (уже в фоне) ----------
+        bottom_hint_y = self._hint_y
 
         # ---------- область под градусник и график ----------
         top_area = status_y + s_h + 8
@@ -88,7 +124,7 @@ class TempApp:
         bar_h = bottom_area - top_area
 
         draw.rectangle([bar_x, bar_y, bar_x + bar_w, bar_y + bar_h],
-                       outline=(80,80,80), width=1)
+                       outline=_FRAME, width=1)
 
         ratio = max(0.0, min(1.0, temp / 90.0))
         fill_h = int(bar_h * ratio)
@@ -112,34 +148,37 @@ class TempApp:
             graph_h = graph_y1 - graph_y0
 
             draw.rectangle([graph_x0, graph_y0, graph_x1, graph_y1],
-                           outline=(60,60,60), width=1)
-
-            vals = hist
-            vmin = min(vals)
-            vmax = max(vals)
+                           outline=_GRID, width=1)
+
+            # X — по времени замера: монитор не пишет в историю повторяющиеся
+            # значения. Хвост тянем до текущего замера
+            vals = np.asarray(hist.values(), dtype=float) / hist.scale  # хранятся десятые доли °C
+            times = np.asarray(self.monitor.temp_times.values(), dtype=float)
+            t_end = self.monitor.last_temp_sample
+            if t_end > times[-1]:
+                times = np.append(times, t_end)
+                vals = np.append(vals, temp)
+            vmin = float(vals.min())
+            vmax = float(vals.max())
             if vmax == vmin:
                 vmax = vmin + 1.0
 
-            # подписи min/max в градусах
+            # подписи min/max в градусах — готовые маски, без FreeType на каждый кадр
             top_label = f"{int(vmax)}°"
             bot_label = f"{int(vmin)}°"
-            tlw, tlh = self._text_size(draw, top_label, self.font_label)
-            blw, blh = self._text_size(draw, bot_label, self.font_label)
-            draw.text((graph_x0 - tlw - 2, graph_y0 - tlh//2),
-                      top_label, font=self.font_label, fill=(150,150,150))
-            draw.text((graph_x0 - blw - 2, graph_y1 - blh//2),
-                      bot_label, font=self.font_label, fill=(150,150,150))
-
-            n = len(vals)
-            step_x = graph_w / max(1, n - 1)
-            points = []
-            for i, v in enumerate(vals):
-                x = graph_x0 + i * step_x
-                r = (v - vmin) / (vmax - vmin)
-                y = graph_y1 - r * graph_h
-                points.append((x, y))
-            for i in range(1, len(points)):
-                draw.line([points[i-1], points[i]],
-                          fill=(120,200,250), width=1)
+            tlw, tlh = measure(top_label, self.font_label)
+            blw, blh = measure(bot_label, self.font_label)
+            paste_text(img, (graph_x0 - tlw - 2, graph_y0 - tlh//2), top_label, self.font_label, _DIM)
+            paste_text(img, (graph_x0 - blw - 2, graph_y1 - blh//2), bot_label, self.font_label, _DIM)
+
+            # линия графика одной полилинией
+            span = max(1e-9, times[-1] - times[0])
+            xs = graph_x0 + (times - times[0]) * (graph_w / span)
+            ys = graph_y1 - (vals - vmin) / (vmax - vmin) * graph_h
+            draw.line(list(zip(xs.tolist(), ys.tolist())),
+                      fill=_LINE, width=1)
 
         self.hw.show(img)
+
+
+APP_CLASS = TempApp
@@ -108,6 +108,17 @@ class RaspberryPi:
         if self.SPI!=None :
             self.SPI.writebytes(data)
 
+    def spi_writebuffer(self, buf):
+        """Write a bytes-like buffer in one call; spidev splits it by bufsiz in C"""
+        if self.SPI==None :
+            return
+        if hasattr(self.SPI, "writebytes2"):
+            self.SPI.writebytes2(buf)
+        else:
+            # spidev < 3.3: writebytes() takes at most 4096 bytes per call
+            for i in range(0,len(buf),4096):
+                self.SPI.writebytes(buf[i:i+4096])
+
     def bl_DutyCycle(self, duty):
         self.GPIO_BL_PIN.value = duty / 100
         
@@ -1,18 +1,35 @@
+from itertools import islice
+
 from PIL import Image, ImageDraw
 
 def _wrap_lines(lines, max_chars):
-    """Wrap long lines into several lines with max_chars each."""
-    wrapped = []
+    """Wrap long lines into several lines with max_chars each (lazily)."""
     for line in lines:
         line = line.rstrip()
-        if not line:
-            wrapped.append("")
+        n = len(line)
+        if n <= max_chars:
+            yield line
             continue
-        while len(line) > max_chars:
-            wrapped.append(line[:max_chars])
-            line = line[max_chars:]
-        wrapped.append(line)
-    return wrapped
+        for i in range(0, n, max_chars):
+            yield line[i:i + max_chars]
+
+
+def _wrapped_count(lines, max_chars):
+    """Сколько строк даст _wrap_lines, без нарезки самих строк."""
+    return sum(max(1, -(-len(line.rstrip()) // max_chars)) for line in lines)
+
+
+_canvas = None  # (image, draw): один кадр на все перерисовки консоли
+
+
+def _clear_canvas(width, height):
+    global _canvas
+    if _canvas is None or _canvas[0].size != (width, height):
+        image = Image.new("RGB", (width, height), (0, 0, 0))
+        _canvas = (image, ImageDraw.Draw(image))
+    else:
+        _canvas[0].paste((0, 0, 0), (0, 0, width, height))
+    return _canvas
 
 
 def draw_console(hw, font_label, console_lines, console_scroll):
@@ -25,8 +42,7 @@ def draw_console(hw, font_label, console_lines, console_scroll):
     console_scroll — индекс первой видимой строки (по wrapped-строкам)
     """
     width, height = hw.W, hw.H
-    image = Image.new("RGB", (width, height), (0, 0, 0))
-    draw = ImageDraw.Draw(image)
+    image, draw = _clear_canvas(width, height)
 
     top_bar_h = 20
 
@@ -37,25 +53,25 @@ def draw_console(hw, font_label, console_lines, console_scroll):
 
     # Обёртка текста, чтобы строки не вылазили за экран по X
     max_chars = 24   # подбирается под ширину твоего дисплея
-    wrapped = _wrap_lines(console_lines, max_chars)
+    if not console_lines:
+        console_lines = ["(no output)"]
+    total = _wrapped_count(console_lines, max_chars)
 
     row_h = 14
     max_rows = (height - top_bar_h) // row_h
 
-    if not wrapped:
-        wrapped = ["(no output)"]
-
     # Нормализуем скролл (если вышел за границы)
     if console_scroll < 0:
         console_scroll = 0
-    if console_scroll > max(0, len(wrapped) - max_rows):
-        console_scroll = max(0, len(wrapped) - max_rows)
+    if console_scroll > max(0, total - max_rows):
+        console_scroll = max(0, total - max_rows)
 
+    # режем только видимое окно, остальное не переносится вовсе
     start = console_scroll
-    end = min(start + max_rows, len(wrapped))
+    end = min(start + max_rows, total)
 
     y = top_bar_h
-    for line in wrapped[start:end]:
+    for line in islice(_wrap_lines(console_lines, max_chars), start, end):
         draw.text((2, y), line, font=font_label, fill=(255, 255, 255))
         y += row_h
 
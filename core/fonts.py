@@ -1,18 +1,66 @@
-from PIL import ImageFont
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Отдельный 1×1 холст только для измерения текста
+_SCRATCH_DRAW = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+FONT_REGULAR = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+FONT_BOLD = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+
+
+@lru_cache(maxsize=None)
+def get_font(path, size):
+    """ImageFont.truetype, но каждый (path, size) читается и парсится только один раз."""
+    return ImageFont.truetype(path, size)
+
 
 def load_fonts():
+    """
+    Fonts:
+    - font_big   : time on screensaver
+    - font_small : date
+    - font_label : labels under icons / list items
+    """
     try:
-        font_big = ImageFont.truetype(
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 60
-        )
-        font_small = ImageFont.truetype(
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 20
-        )
-        font_label = ImageFont.truetype(
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 15
-        )
+        font_big = get_font(FONT_BOLD, 60)
+        font_small = get_font(FONT_REGULAR, 20)
+        font_label = get_font(FONT_REGULAR, 15)
     except Exception:
         font_big = ImageFont.load_default()
         font_small = ImageFont.load_default()
         font_label = ImageFont.load_default()
     return font_big, font_small, font_label
+
+
+@lru_cache(maxsize=256)
+def measure(text, font):
+    """(w, h) текста через textbbox; результат кешируется по (text, font)."""
+    bbox = _SCRATCH_DRAW.textbbox((0, 0), text, font=font)
+    return bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+
+@lru_cache(maxsize=512)
+def text_mask(text, font):
+    """
+    Текст, растеризованный один раз в "L"-маску: (mask, (dx, dy)).
+    Рисуется через img.paste(color, (x + dx, y + dy), mask) — так же, как
+    draw.text((x, y), ...); смещение не нулевое, только если глифы
+    выступают левее или выше точки привязки (j, T, _).
+    """
+    return render_mask(text, font)
+
+
+def render_mask(text, font):
+    """То же, что text_mask(), но без общего кеша — для меняющихся строк (ввод текста)."""
+    x0, y0, x1, y1 = font.getbbox(text)
+    dx, dy = min(0, x0), min(0, y0)
+    mask = Image.new("L", (max(1, x1 - dx), max(1, y1 - dy)), 0)
+    ImageDraw.Draw(mask).text((-dx, -dy), text, font=font, fill=255)
+    return mask, (dx, dy)
+
+
+def paste_text(img, xy, text, font, fill):
+    """То же, что ImageDraw.Draw(img).text(xy, text, font=font, fill=fill), но из кеша масок."""
+    mask, (dx, dy) = text_mask(text, font)
+    img.paste(fill, (xy[0] + dx, xy[1] + dy), mask)
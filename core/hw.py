@@ -1,5 +1,30 @@
+import logging
+import mmap
+import os
+import threading
+from collections import deque
+
+import numpy as np
 import ST7789
-from PIL import Image
+
+GPIOMEM_PATH = "/dev/gpiomem"  # GPIO-блок BCM283x, доступен без root
+GPLEV0 = 0x34                  # регистр уровней GPIO 0..31
+
+
+def _map_gplev0():
+    """Read-only mmap регистра GPLEV0 как 32-битного слова; None, если недоступно."""
+    try:
+        fd = os.open(GPIOMEM_PATH, os.O_RDONLY | os.O_SYNC)
+    except OSError:
+        return None
+    try:
+        mem = mmap.mmap(fd, 4096, mmap.MAP_SHARED, mmap.PROT_READ)
+    except (OSError, ValueError):
+        return None
+    finally:
+        os.close(fd)
+    return memoryview(mem).cast("I")
+
 
 class HWDisplay:
     def __init__(self):
@@ -11,28 +36,195 @@ class HWDisplay:
         self.W = self.disp.width
         self.H = self.disp.height
 
+        # SPI-передачу ведёт фоновый поток: кадр упакован в байты (это и есть
+        # второй буфер), и главный цикл рисует следующий, пока этот уходит на панель
+        self._full_window = (0, 0, self.disp.width, self.disp.height)
+        self._tx = deque()
+        self._tx_cond = threading.Condition()
+        self._tx_busy = False
+        self._last_full = None  # байты последнего целого кадра, если панель показывает ровно его
+        self._tx_thread = threading.Thread(target=self._tx_run, name="HWDisplay-spi", daemon=True)
+        self._tx_thread.start()
+
+        # карта кнопок не меняется за время работы — собираем один раз
+        self._pins = {
+            "UP": self.disp.GPIO_KEY_UP_PIN,
+            "DOWN": self.disp.GPIO_KEY_DOWN_PIN,
+            "LEFT": self.disp.GPIO_KEY_LEFT_PIN,
+            "RIGHT": self.disp.GPIO_KEY_RIGHT_PIN,
+            "CENTER": self.disp.GPIO_KEY_PRESS_PIN,
+            "KEY1": self.disp.GPIO_KEY1_PIN,
+            "KEY2": self.disp.GPIO_KEY2_PIN,
+            "KEY3": self.disp.GPIO_KEY3_PIN,
+        }
+        # тот же порядок кнопок, но кортежами — для горячего цикла опроса
+        self.pin_names = tuple(self._pins)
+        self.pin_items = tuple(self._pins.items())
+        self._init_bulk_read()
+
+        self._input_evt = threading.Event()
+        self._init_edge_wakeup()
+
     def clear(self):
+        self.flush()
         self.disp.clear()
+        self._last_full = None
 
     def backlight(self, power):
         self.disp.bl_DutyCycle(power)
 
     def show(self, pil_img):
-        rotated = pil_img.rotate(270)
-        self.disp.ShowImage(rotated)
+        # RGB565 пакуем прямо из кадра экрана, а поворот на 270° numpy делает
+        # в том же копировании, что и перестановку байт, — без повёрнутого PIL-кадра
+        self._submit(self._panel_bytes(pil_img), self._full_window)
+
+    def show_panel(self, pil_img):
+        """Полный кадр, уже повёрнутый в ориентацию панели (H×W), — без поворота."""
+        self._submit(self.disp.image_to_rgb565(pil_img), self._full_window)
+
+    def show_region(self, pil_img, box):
+        """
+        Отправить на экран только прямоугольник box = (x0, y0, x1, y1)
+        из pil_img (координаты экрана, как в show()).
+        """
+        x0, y0, x1, y1 = box
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.W, x1), min(self.H, y1)
+        if x1 <= x0 or y1 <= y0:
+            return
+        region = pil_img.crop((x0, y0, x1, y1))
+        # после поворота на 270° точка экрана (x, y) попадает в (H - 1 - y, x) панели
+        self._submit(self._panel_bytes(region), (self.H - y1, x0, self.H - y0, x1))
+
+    def _panel_bytes(self, pil_img):
+        """Кадр экрана → big-endian RGB565 в ориентации панели (поворот на 270°)."""
+        pix = self.disp.rgb565_array(pil_img)
+        return np.rot90(pix, -1).astype(">u2").tobytes()
+
+    def _submit(self, buf, window):
+        with self._tx_cond:
+            if window == self._full_window:
+                # тот же кадр, что уже на панели (или в очереди), — SPI не трогаем
+                if buf == self._last_full:
+                    return
+                self._last_full = buf
+                self._tx.clear()  # целый кадр перекрывает всё, что ещё не ушло
+            else:
+                self._last_full = None
+            self._tx.append((buf, window))
+            self._tx_cond.notify_all()
+
+    def _tx_run(self):
+        cond = self._tx_cond
+        while True:
+            with cond:
+                while not self._tx:
+                    self._tx_busy = False
+                    cond.notify_all()  # для flush()
+                    cond.wait()
+                buf, window = self._tx.popleft()
+                self._tx_busy = True
+            try:
+                self.disp.WriteWindow(buf, *window)
+            except Exception as e:
+                self._last_full = None  # содержимое панели теперь неизвестно
+                logging.warning("SPI write failed: %s", e)
+
+    def flush(self):
+        """Дождаться, пока всё отправленное через show*/show_region уйдёт на панель."""
+        with self._tx_cond:
+            while self._tx or self._tx_busy:
+                self._tx_cond.wait()
 
     def gpio_read(self, pin):
         return self.disp.digital_read(pin)
 
+    def _init_bulk_read(self):
+        """
+        Готовим чтение всех кнопок одним словом GPLEV0.
+        Для каждой кнопки: (имя, номер BCM, active_high) — value у gpiozero
+        инвертирован для кнопок с подтяжкой вверх.
+        """
+        self._gplev = None
+        bits = []
+        for name, dev in self.pin_items:
+            number = getattr(getattr(dev, "pin", None), "number", None)
+            if not isinstance(number, int) or not 0 <= number < 32:
+                return
+            bits.append((number, bool(dev.active_high)))
+        self._pin_bits = tuple(bits)
+        self._pin_mask = sum(1 << number for number, _ in bits)
+
+        gplev = _map_gplev0()
+        if gplev is None:
+            return
+        # сверяемся с обычным чтением — если регистр не тот (другой SoC), не используем
+        self._gplev = gplev
+        if self._read_levels() != self._read_each():
+            self._gplev = None
+
+    def _read_each(self):
+        return [self.gpio_read(pin) for _, pin in self.pin_items]
+
+    def _read_levels(self):
+        return self.levels_from_mask(self._gplev[GPLEV0 // 4])
+
+    def levels_from_mask(self, word):
+        """Слово GPLEV0 (или маска из read_mask) → значения кнопок, как у read_pins()."""
+        return [
+            ((word >> number) & 1) if active_high else 1 - ((word >> number) & 1)
+            for number, active_high in self._pin_bits
+        ]
+
+    def read_mask(self):
+        """
+        Сырые биты кнопок из GPLEV0 одним целым (для быстрой проверки
+        «ничего не изменилось»); None, если чтение регистром недоступно.
+        """
+        if self._gplev is None:
+            return None
+        return self._gplev[GPLEV0 // 4] & self._pin_mask
+
+    def read_pins(self):
+        """
+        Значения всех кнопок списком в порядке pin_names, как у gpio_read().
+        По возможности одним чтением регистра вместо восьми вызовов digital_read.
+        """
+        if self._gplev is not None:
+            return self._read_levels()
+        return self._read_each()
+
+    def _init_edge_wakeup(self):
+        """
+        Фронт любой кнопки будит главный цикл (колбэки gpiozero приходят из
+        потока pin factory). Если фабрика так не умеет, wait_input() — просто sleep,
+        а edge_wakeup остаётся False: тогда кнопки надо опрашивать по таймеру.
+        """
+        self.edge_wakeup = False
+        try:
+            for _, dev in self.pin_items:
+                dev.when_activated = self._on_edge
+                dev.when_deactivated = self._on_edge
+        except Exception:
+            return
+        self.edge_wakeup = True
+
+    def _on_edge(self, *_):
+        self._input_evt.set()
+
+    def wake(self):
+        """Разбудить wait_input() из другого потока (например, пришли новые данные)."""
+        self._input_evt.set()
+
+    def wait_input(self, timeout):
+        """
+        Поспать до timeout секунд, но проснуться сразу при нажатии/отпускании кнопки.
+        True — разбудил фронт. Сам опрос кнопок остаётся за read_buttons.
+        """
+        woke = self._input_evt.wait(timeout)
+        self._input_evt.clear()
+        return woke
+
     @property
     def pins(self):
-        return {
-            "UP": self.disp.GPIO_KEY_UP_PIN,
-            "DOWN": self.disp.GPIO_KEY_DOWN_PIN,
-            "LEFT": self.disp.GPIO_KEY_LEFT_PIN,
-            "RIGHT": self.disp.GPIO_KEY_RIGHT_PIN,
-            "CENTER": self.disp.GPIO_KEY_PRESS_PIN,
-            "KEY1": self.disp.GPIO_KEY1_PIN,
-            "KEY2": self.disp.GPIO_KEY2_PIN,
-            "KEY3": self.disp.GPIO_KEY3_PIN,
-        }
+        return self._pins
@@ -1,13 +1,59 @@
-def read_buttons(hw, prev_states):
-    pins = hw.pins
-    new_states = {}
+import time
+
+DEBOUNCE_S = 0.010  # новый уровень принимаем после стольких секунд тишины на пине
+
+
+def init_button_states(hw):
+    """
+    Начальное состояние для read_buttons: [levels, raw, deadlines, mask] —
+    принятые уровни, последние сырые уровни и сроки принятия (None — ничего
+    не ждёт), все в порядке hw.pin_names, и сырая маска GPLEV0 (или None).
+    """
+    mask = hw.read_mask()
+    levels = hw.read_pins() if mask is None else hw.levels_from_mask(mask)
+    return [levels, list(levels), [None] * len(levels), mask]
+
+
+def next_deadline(state):
+    """Ближайший срок принятия уровня (time.monotonic) или None, если ничего не ждёт."""
+    return min((d for d in state[2] if d is not None), default=None)
+
+
+def read_buttons(hw, state, now=None, debounce_s=DEBOUNCE_S):
+    """
+    state от init_button_states, обновляется на месте.
+    Антидребезг с отсрочкой: каждая смена сырого уровня переносит срок на
+    debounce_s вперёд, а уровень принимается, только когда пин продержался
+    столько без изменений, — выбросы и дребезг событий не порождают.
+    Возвращает (event, state).
+    """
+    levels, raw, deadlines = state[0], state[1], state[2]
+
+    # почти на каждом тике кнопки не трогают: одно сравнение слова GPLEV0
+    mask = hw.read_mask()
+    if mask is not None and mask == state[3] and not any(deadlines):
+        return None, state
+
+    if now is None:
+        now = time.monotonic()
+    state[3] = mask
     event = None
 
-    for name, pin in pins.items():
-        val = hw.gpio_read(pin)
-        new_states[name] = val
-        prev = prev_states.get(name, 1)
+    # уровни разбираем из того же слова, что сравнивали, — без второго чтения
+    vals = hw.read_pins() if mask is None else hw.levels_from_mask(mask)
+    for i, val in enumerate(vals):
+        if val != raw[i]:
+            raw[i] = val
+            # вернулся к принятому уровню — был дребезг, ждать нечего
+            deadlines[i] = now + debounce_s if val != levels[i] else None
+            continue
+        d = deadlines[i]
+        if d is None or now < d:
+            continue
+        deadlines[i] = None
+        prev = levels[i]
+        levels[i] = val
         if prev == 1 and val == 0 and event is None:
-            event = name
+            event = hw.pin_names[i]
 
-    return event, new_states
+    return event, state
@@ -1,74 +1,273 @@
+import os
+import threading
 import time
+from array import array
+from collections import deque
+
+STAT_PATH = "/proc/stat"
+MEMINFO_PATH = "/proc/meminfo"
+THERMAL_PATH = "/sys/class/thermal/thermal_zone0/temp"
+MIN_INTERVAL = 1.0  # чаще procfs опрашивать незачем
+TEMP_EPS = 0.1        # температура, отличающаяся не больше чем на столько, — «та же»
+TEMP_KEEP_EVERY = 10  # но хотя бы каждый N-й замер в историю всё равно пишем
+
+
+def _open_or_none(path):
+    try:
+        return open(path, "rb", buffering=0)
+    except OSError:
+        return None
+
+
+def _meminfo_kb(buf, key):
+    """Значение поля /proc/meminfo в kB (0, если поля нет)."""
+    idx = buf.find(key)
+    if idx < 0:
+        return 0
+    return int(buf[idx + len(key):idx + len(key) + 32].split()[0])
+
+
+class RingHistory:
+    """
+    Кольцевой буфер фиксированной длины поверх array.array: точки лежат
+    одним куском памяти узкого типа, а не отдельными float-объектами.
+    Для целых typecode значение хранится как round(v * scale) с обрезкой
+    по диапазону типа; values() отдаёт сырые числа — делить на scale при чтении.
+    """
+
+    def __init__(self, typecode, size, scale=1):
+        self.scale = scale
+        self._buf = array(typecode, bytes(array(typecode).itemsize * size))
+        self._size = size
+        self._head = 0   # куда писать следующую точку
+        self._len = 0
+        if typecode in "fd":
+            self._lo = self._hi = None
+        else:
+            bits = 8 * self._buf.itemsize
+            signed = typecode.islower()
+            self._lo = -(1 << (bits - 1)) if signed else 0
+            self._hi = (1 << (bits - 1)) - 1 if signed else (1 << bits) - 1
+
+    def append(self, value):
+        if self._lo is not None:
+            value = max(self._lo, min(self._hi, int(round(value * self.scale))))
+        self._buf[self._head] = value
+        self._head = (self._head + 1) % self._size
+        if self._len < self._size:
+            self._len += 1
+
+    def last(self):
+        """Последняя точка в исходных единицах (None, если пусто)."""
+        if not self._len:
+            return None
+        v = self._buf[self._head - 1]
+        return v if self._lo is None else v / self.scale
+
+    def values(self):
+        """Точки от старой к новой: array того же typecode, годится для np.asarray."""
+        if self._len < self._size:
+            return self._buf[:self._len]
+        return self._buf[self._head:] + self._buf[:self._head]
+
+    def __len__(self):
+        return self._len
+
 
 class SystemMonitor:
-    def __init__(self, max_points=600, interval=1.0):
+    def __init__(self, max_points=600, interval=1.0, temp_interval=10.0):
         """
-        max_points  — сколько последних точек хранить (600 ≈ 10 минут при шаге 1с)
-        interval    — как часто брать новые значения, в секундах
+        max_points    — сколько последних точек хранить (600 ≈ 10 минут при шаге 1с)
+        interval      — как часто брать CPU/RAM, в секундах (не чаще MIN_INTERVAL)
+        temp_interval — как часто брать температуру: она меняется медленно
         """
         self.max_points = max_points
-        self.interval = interval
-        self.last_sample = 0.0
+        self.interval = max(MIN_INTERVAL, float(interval))
+        self.temp_interval = max(self.interval, float(temp_interval))
+        self.last_sample = 0.0  # time.monotonic() последней выборки, 0.0 — ещё не было
+        self.last_temp_sample = 0.0
 
         # Текущие значения
         self.cpu_percent = 0.0
         self.mem_used = 0
         self.mem_total = 0
         self.temp_c = 0.0
+        self._vcgencmd_ok = True  # False после первой неудачи vcgencmd
 
-        # История
-        self.cpu_history = []
-        self.temp_history = []
+        # procfs/sysfs открываем один раз, дальше только seek(0) + read()
+        self._f_stat = _open_or_none(STAT_PATH)
+        self._f_mem = _open_or_none(MEMINFO_PATH)
+        self._prev_cpu_total = 0  # счётчики строки "cpu" /proc/stat с прошлого замера
+        self._prev_cpu_idle = 0
+        self._read_cpu()  # первый замер — прирост от этой точки, а не средняя загрузка с момента старта
+        try:
+            self._temp_fd = os.open(THERMAL_PATH, os.O_RDONLY)  # читаем через os.pread
+        except OSError:
+            self._temp_fd = None
+
+        # История — кольцевые буферы узких типов вместо deque из float:
+        # CPU — целые проценты (uint8), температура — десятые доли °C (uint16)
+        self.cpu_history = RingHistory("B", max_points)
+        self.temp_history = RingHistory("H", max_points, scale=10)
+        self.temp_times = RingHistory("d", max_points)  # monotonic-время каждой точки temp_history
+        self._temp_skipped = 0
+
+        # фоновый опрос (start/stop): поток только читает файлы и кладёт готовые
+        # замеры в _inbox; в атрибуты и истории их переносит sample() в главном цикле,
+        # поэтому приложения читают буферы RingHistory без блокировок и без гонок:
+        # пишет в них только главный поток через sample()
+        self._thread = None
+        self._stop_evt = threading.Event()
+        self._inbox = deque(maxlen=16)
+
+    def start(self):
+        """Запустить опрос в фоновом потоке: медленный procfs не тормозит отрисовку."""
+        if self._thread is not None:
+            return
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run, name="SystemMonitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        t, self._thread = self._thread, None
+        if t is None:
+            return
+        self._stop_evt.set()
+        t.join(timeout=2.0)
+
+    def _run(self):
+        next_temp = 0.0
+        while not self._stop_evt.is_set():
+            now = time.monotonic()
+            with_temp = now >= next_temp
+            if with_temp:
+                next_temp = now + self.temp_interval
+            self._inbox.append((now, self._read_all(with_temp)))  # append у deque потокобезопасен
+            self._stop_evt.wait(self.interval)
 
     def sample(self, now=None):
-        """Вызывается из main.py в каждом цикле. Сам решает, пора ли брать новую точку."""
-        if now is None:
-            now = time.time()
-        if now - self.last_sample < self.interval:
+        """
+        Вызывается из main.py в каждом цикле. Сам решает, пора ли брать новую точку.
+        now — time.monotonic(): перевод системных часов (NTP) не ломает интервал.
+        После start() только забирает готовые замеры фонового потока.
+        """
+        if self._thread is not None:
+            inbox = self._inbox
+            while inbox:
+                self._apply(*inbox.popleft())
             return
-        self.last_sample = now
 
-        self._sample_cpu()
-        self._sample_mem()
-        self._sample_temp()
+        if now is None:
+            now = time.monotonic()
+        if self.last_sample and now - self.last_sample < self.interval:
+            return
+        self._sample_all(now)
 
-        # обновляем истории
-        self.cpu_history.append(self.cpu_percent)
-        if len(self.cpu_history) > self.max_points:
-            self.cpu_history.pop(0)
+    def _sample_all(self, now):
+        with_temp = (not self.last_temp_sample
+                     or now - self.last_temp_sample >= self.temp_interval)
+        self._apply(now, self._read_all(with_temp))
 
-        self.temp_history.append(self.temp_c)
-        if len(self.temp_history) > self.max_points:
-            self.temp_history.pop(0)
+    def _read_all(self, with_temp):
+        """
+        Один проход по всем источникам: /proc/stat, /proc/meminfo и (если with_temp)
+        температура — закешированные файлы читаются подряд, в одном кадре.
+        Атрибуты не трогает (может работать в фоновом потоке), возвращает
+        (cpu_percent, mem_used, mem_total, temp_c или None, если не читали).
+        """
+        cpu = self._read_cpu()
 
-    def _sample_cpu(self):
+        # RAM: одним read(), нужные строки в самом начале файла
         try:
-            with open("/proc/loadavg", "r") as f:
-                load1 = float(f.read().split()[0])
-            # Pi Zero 2W — 4 ядра, грубая оценка:
-            self.cpu_percent = max(0.0, min(100.0, load1 * 25.0))
+            f = self._f_mem
+            f.seek(0)
+            buf = f.read(4096)
+            # в Linux MemTotal — 1-я строка, MemAvailable — 3-я; режем только их
+            head = buf.split(b"\n", 3)
+            if (len(head) > 3 and head[0].startswith(b"MemTotal:")
+                    and head[2].startswith(b"MemAvailable:")):
+                mem_total = int(head[0].split()[1])  # kB
+                mem_available = int(head[2].split()[1])
+            else:
+                mem_total = _meminfo_kb(buf, b"MemTotal:")
+                mem_available = _meminfo_kb(buf, b"MemAvailable:")
+            mem_used = (mem_total - mem_available) // 1024
+            mem_total //= 1024
         except Exception:
-            self.cpu_percent = 0.0
+            mem_total = 0
+            mem_used = 0
 
-    def _sample_mem(self):
+        if not with_temp:
+            return cpu, mem_used, mem_total, None
+        # сначала sysfs: pread с нулевого смещения — ни file-объекта, ни seek, ни fork
+        temp = None
+        if self._temp_fd is not None:
+            try:
+                temp = int(os.pread(self._temp_fd, 16, 0)) / 1000.0
+            except (OSError, ValueError):
+                temp = None
+        if temp is None:
+            temp = self._temp_vcgencmd()
+        return cpu, mem_used, mem_total, (temp if temp is not None else 0.0)
+
+    def _read_cpu(self):
+        """
+        Загрузка CPU в % по приросту счётчиков /proc/stat с прошлого замера
+        (loadavg — это очередь задач, а не занятость процессора).
+        """
         try:
-            mem_total = 0
-            mem_available = 0
-            with open("/proc/meminfo", "r") as f:
-                for line in f:
-                    if line.startswith("MemTotal:"):
-                        mem_total = int(line.split()[1])  # kB
-                    elif line.startswith("MemAvailable:"):
-                        mem_available = int(line.split()[1])
-            self.mem_total = mem_total // 1024
-            self.mem_used = (mem_total - mem_available) // 1024
+            f = self._f_stat
+            f.seek(0)
+            # cpu  user nice system idle iowait irq softirq steal ...
+            # первая строка целиком влезает в 256 байт; readline() у небуферизованного
+            # файла читал бы по байту за системный вызов
+            fields = f.read(256).split(b"\n", 1)[0].split()[1:9]
+            total = sum(map(int, fields))
+            idle = int(fields[3]) + int(fields[4])  # idle + iowait
         except Exception:
-            self.mem_total = 0
-            self.mem_used = 0
+            # /proc/stat недоступен — грубая оценка по loadavg (Pi Zero 2W — 4 ядра)
+            try:
+                load1 = os.getloadavg()[0]
+            except OSError:
+                return 0.0
+            return max(0.0, min(100.0, load1 * 25.0))
 
-    def _sample_temp(self):
+        d_total = total - self._prev_cpu_total
+        d_idle = idle - self._prev_cpu_idle
+        self._prev_cpu_total = total
+        self._prev_cpu_idle = idle
+        if d_total <= 0:
+            return 0.0
+        return max(0.0, min(100.0, (d_total - d_idle) * 100.0 / d_total))
+
+    def _apply(self, now, values):
+        """Перенести замер из _read_all в текущие значения и истории."""
+        self.cpu_percent, self.mem_used, self.mem_total, temp = values
+        self.last_sample = now
+        self.cpu_history.append(self.cpu_percent)
+
+        # температура — своим, более редким шагом
+        if temp is None:
+            return
+        self.last_temp_sample = now
+        self.temp_c = temp
+
+        # одинаковые подряд замеры в историю не пишем: точки хранят свои времена,
+        # так что ось X у графика от пропусков не плывёт
+        hist = self.temp_history
+        if (len(hist) and abs(temp - hist.last()) <= TEMP_EPS
+                and self._temp_skipped < TEMP_KEEP_EVERY - 1):
+            self._temp_skipped += 1
+            return
+        self._temp_skipped = 0
+        hist.append(temp)
+        self.temp_times.append(now)
+
+    def _temp_vcgencmd(self):
+        """Запасной путь, только если sysfs недоступен, и пока vcgencmd сам работает."""
+        if not self._vcgencmd_ok:
+            return None
         temp = None
-        # сначала vcgencmd
         try:
             import subprocess
             out = subprocess.check_output(["vcgencmd", "measure_temp"]).decode("utf-8")
@@ -77,14 +276,18 @@ class SystemMonitor:
                 temp = float(s)
         except Exception:
             temp = None
-
-        # потом sysfs
         if temp is None:
-            try:
-                with open("/sys/class/thermal/thermal_zone0/temp", "r") as f:
-                    milli = int(f.read().strip())
-                temp = milli / 1000.0
-            except Exception:
-                temp = 0.0
+            self._vcgencmd_ok = False  # больше не форкаем впустую
+        return temp
 
-        self.temp_c = temp
+    def close(self):
+        """Закрыть закешированные файлы procfs/sysfs (при выходе из программы)."""
+        self.stop()
+        for name in ("_f_stat", "_f_mem"):
+            f = getattr(self, name)
+            setattr(self, name, None)
+            if f is not None:
+                f.close()
+        fd, self._temp_fd = self._temp_fd, None
+        if fd is not None:
+            os.close(fd)
@@ -2,31 +2,49 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import time
-import json
+import fcntl
+import socket
+import struct
 import subprocess
 import logging
-from datetime import datetime
-import shutil  # for deleting non-empty folders
+import functools
+import threading
+import signal
 
 from PIL import ImageFont
 from PIL import Image, ImageDraw
 
 from core.hw import HWDisplay
-from core.fonts import load_fonts as core_load_fonts
-from core.input import read_buttons as core_read_buttons
+from core.fonts import load_fonts as core_load_fonts, measure, paste_text
+from core.input import read_buttons as core_read_buttons, init_button_states, next_deadline
 from core.console import draw_console
 from core.monitor import SystemMonitor
 
-from ui.screensaver import draw_screensaver as ui_draw_screensaver
-from ui.main_menu import draw_main_menu as ui_draw_main_menu
-from ui.list_view import draw_list_view as ui_draw_list_view
-from ui.options_menu import draw_options_menu as ui_draw_options_menu
-
 from apps.loader import load_app
 
 from ui_keyboard import OnScreenKeyboard  # on-screen keyboard
 
+# orjson (optional) parses bytes directly and is several times faster than json
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    orjson = None
+    import json
+
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
+
 logging.basicConfig(level=logging.INFO)
 
 # ---------- Paths ----------
@@ -49,6 +67,10 @@ GPS_FIX_ICON_PATH = os.path.join(ICONS_DIR, "gps_fix.png")
 FOLDER_ICON_NAME = "folder.png"
 APP_DEFAULT_ICON_NAME = "app_default.png"
 
+# Filter for icon downscaling: at 20-48 px BICUBIC looks the same as LANCZOS
+# but costs noticeably less
+ICON_RESAMPLE = Image.BICUBIC
+
 # ---------- Display init ----------
 
 hw = HWDisplay()
@@ -56,6 +78,43 @@ disp = hw.disp  # временная совместимость
 SCREEN_WIDTH = hw.W
 SCREEN_HEIGHT = hw.H
 
+# One framebuffer for all menu screens: hw.show() sends it synchronously,
+# so it is cleared and redrawn instead of allocating a new Image per frame
+_FB = Image.new("RGB", (SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0, 0))
+_FB_DRAW = ImageDraw.Draw(_FB)
+
+
+def _clear_fb():
+    """Black out the shared framebuffer; returns (image, draw)."""
+    _FB.paste((0, 0, 0), (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+    return _FB, _FB_DRAW
+
+
+# What the panel shows from _FB: screen name + per-block signatures.
+# The main loop resets it whenever another state (app, keyboard, console) takes the panel.
+_shown = {"screen": None, "blocks": {}}
+
+
+def _invalidate_shown():
+    _shown["screen"] = None
+
+
+def _push_blocks(screen, blocks):
+    """
+    Send _FB to the panel: the whole frame if another screen was shown before,
+    otherwise only the boxes whose signature changed.
+    blocks: [(name, signature, (x0, y0, x1, y1)), ...]
+    """
+    prev = _shown["blocks"] if _shown["screen"] == screen else None
+    _shown["screen"] = screen
+    _shown["blocks"] = {name: sig for name, sig, _ in blocks}
+    if prev is None:
+        hw.show(_FB)
+        return
+    for name, sig, box in blocks:
+        if prev.get(name) != sig:
+            hw.show_region(_FB, box)
+
 # ---------- UI states ----------
 
 STATE_SCREENSAVER = "screensaver"
@@ -70,6 +129,8 @@ KB_MODE_RENAME = "rename"
 KB_MODE_NEW_FOLDER = "new_folder"
 
 IDLE_TIMEOUT = 999999999.0  # seconds of idle to go back to screensaver
+FRAME_S = 0.05              # main loop tick; a button edge wakes it earlier
+BUTTON_DEBOUNCE_S = 0.010   # a pin must stay quiet this long before its level counts
 
 # ---------- Console global state ----------
 
@@ -103,89 +164,73 @@ GPS_STATE_OFF = "off"       # нет модуля
 GPS_STATE_SEARCH = "search" # модуль есть, но фикса нет
 GPS_STATE_FIX = "fix"       # есть координаты (2D/3D фикс)
 
+USB_DEVICES_DIR = "/sys/bus/usb/devices"
+UBLOX_VENDOR_ID = b"1546"   # USB vendor id u-blox
+
 
 def is_gps_connected() -> bool:
     """
-    GPS считается подключённым, если в lsusb виден девайс u-blox.
+    GPS считается подключённым, если среди USB-устройств есть u-blox.
     Этого достаточно для простого индикатора на экране.
+    Vendor id читаем прямо из sysfs — без форка lsusb и разбора его вывода.
     """
-    out = _run_command(["lsusb"])
-    if not out:
+    try:
+        it = os.scandir(USB_DEVICES_DIR)
+    except OSError:
         return False
-
-    text = out.lower()
-    return "u-blox" in text or "ublox" in text
+    with it:
+        for dev in it:
+            try:
+                with open(os.path.join(dev.path, "idVendor"), "rb") as f:
+                    if f.read().strip() == UBLOX_VENDOR_ID:
+                        return True
+            except OSError:
+                continue  # интерфейсы (1-1:1.0 и т.п.) idVendor не имеют
+    return False
 
 
-_GPS_FIX_CACHE = {
-    "ts": 0.0,
-    "value": False,
-}
+# gpspipe -w prints one JSON object per line, so a TPV with numeric lat/lon
+# can be spotted by substring + regex without json.loads on every message
+_TPV_TAG = '"class":"TPV"'
+_TPV_LAT_RE = re.compile(r'"lat":\s*-?\d')
+_TPV_LON_RE = re.compile(r'"lon":\s*-?\d')
 
 
-def gps_has_fix() -> bool:
+def gps_has_fix(connected=None) -> bool:
     """
     Return True if GPS appears to provide valid coordinates.
+    connected: result of is_gps_connected() if the caller already has it.
 
     Intentionally lenient:
     - any TPV message with non-null lat/lon is treated as a "fix",
       regardless of the reported 'mode' value.
     - protected against hangs and errors:
         * gpspipe timeout
-        * result cached for 2 seconds
         * any exception => False
+    Not cached: SensorCache already calls it only every SENSOR_REFRESH_S.
     """
 
     # If GPS is not physically present → definitely no fix
-    if not is_gps_connected():
-        _GPS_FIX_CACHE["ts"] = time.time()
-        _GPS_FIX_CACHE["value"] = False
+    if connected is None:
+        connected = is_gps_connected()
+    if not connected:
         return False
 
-    now = time.time()
-
-    # Use cached result if we checked recently
-    if now - _GPS_FIX_CACHE["ts"] < 2.0:
-        return _GPS_FIX_CACHE["value"]
-
     try:
         # Read up to 5 messages, wait at most 0.5 s
         out = _run_command(["gpspipe", "-w", "-n", "5"], timeout=0.5)
-        if not out:
-            _GPS_FIX_CACHE["ts"] = now
-            _GPS_FIX_CACHE["value"] = False
-            return False
-
-        has_fix = False
-
         for line in out.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                data = json.loads(line)
-            except Exception:
+            # SKY/ATT/VERSION lines are dropped by the substring test alone
+            if _TPV_TAG not in line:
                 continue
 
-            if data.get("class") != "TPV":
-                continue
-
-            lat = data.get("lat")
-            lon = data.get("lon")
-
             # Main condition: if gpsd reports coordinates, we treat it as a fix
-            if lat is not None and lon is not None:
-                has_fix = True
-                break
-
-        _GPS_FIX_CACHE["ts"] = now
-        _GPS_FIX_CACHE["value"] = has_fix
-        return has_fix
+            if _TPV_LAT_RE.search(line) and _TPV_LON_RE.search(line):
+                return True
+        return False
 
     except Exception:
         # Any error here must never kill the UI
-        _GPS_FIX_CACHE["ts"] = now
-        _GPS_FIX_CACHE["value"] = False
         return False
 
 
@@ -202,7 +247,7 @@ def get_gps_state() -> str:
         if not is_gps_connected():
             return GPS_STATE_OFF
 
-        if gps_has_fix():
+        if gps_has_fix(connected=True):
             return GPS_STATE_FIX
 
         return GPS_STATE_SEARCH
@@ -211,57 +256,186 @@ def get_gps_state() -> str:
         return GPS_STATE_OFF
 
 
+WIFI_OPERSTATE_PATH = "/sys/class/net/wlan0/operstate"
+BT_HCI0_SYSFS = "/sys/class/bluetooth/hci0"
+
+# ioctl HCIGETDEVINFO = _IOR('H', 211, int); struct hci_dev_info is 92 bytes,
+# flags (u32) sit at offset 16; hciconfig prints "UP RUNNING" for HCI_UP|HCI_RUNNING
+_HCIGETDEVINFO = 0x800448D3
+_HCI_DEV_INFO_SIZE = 92
+_HCI_UP_RUNNING = (1 << 0) | (1 << 2)
+
+
 def is_wifi_connected() -> bool:
-    """Wi-Fi is connected if iwgetid -r returned SSID."""
-    ssid = _run_command(["iwgetid", "-r"])
-    return ssid != ""
+    """Wi-Fi is connected if wlan0 is associated (operstate "up"), read from sysfs."""
+    try:
+        with open(WIFI_OPERSTATE_PATH, "rb") as f:
+            return f.read().strip() == b"up"
+    except OSError:
+        return False
 
 
 def is_bluetooth_on() -> bool:
-    """Bluetooth is on if adapter hci0 is UP RUNNING."""
+    """
+    Bluetooth is on if adapter hci0 is UP RUNNING.
+    Flags come from the HCIGETDEVINFO ioctl (what hciconfig itself uses),
+    so no fork; hciconfig stays only as a fallback without AF_BLUETOOTH.
+    """
+    if not os.path.isdir(BT_HCI0_SYSFS):
+        return False  # no adapter at all
+
+    af_bt = getattr(socket, "AF_BLUETOOTH", None)
+    proto = getattr(socket, "BTPROTO_HCI", None)
+    if af_bt is not None and proto is not None:
+        try:
+            with socket.socket(af_bt, socket.SOCK_RAW, proto) as s:
+                buf = bytearray(_HCI_DEV_INFO_SIZE)  # dev_id = 0 -> hci0
+                fcntl.ioctl(s.fileno(), _HCIGETDEVINFO, buf)
+            flags = struct.unpack_from("I", buf, 16)[0]
+            return flags & _HCI_UP_RUNNING == _HCI_UP_RUNNING
+        except OSError:
+            pass
+
     out = _run_command(["hciconfig", "hci0"])
     if not out:
         return False
     return "UP RUNNING" in out or "UP RUNNING" in out.upper()
 
 
+SENSOR_REFRESH_S = 3.0  # how often the background thread re-probes Wi-Fi/BT/GPS
+
+
+class SensorCache:
+    """
+    Last known Wi-Fi / BT / GPS status, refreshed by a daemon thread.
+    The GPS probe forks gpspipe; the screensaver only
+    reads the cached fields, so a slow probe never stalls a frame.
+    GPS is probed only while set_gps_probe(True) — i.e. while the
+    screensaver shows it; other screens (and the GPS app with its own
+    gpspipe client) don't pay for the fork.
+    """
+
+    def __init__(self, interval=SENSOR_REFRESH_S):
+        self.interval = interval
+        self.wifi = False
+        self.bt = False
+        self.gps_state = GPS_STATE_OFF
+        self.probe_gps = False
+        self._stop_evt = threading.Event()
+        self._wake_evt = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        # each field is a single attribute assignment — atomic for readers
+        self.wifi = is_wifi_connected()
+        self.bt = is_bluetooth_on()
+        if self.probe_gps:
+            self.gps_state = get_gps_state()
+
+    def set_gps_probe(self, enabled):
+        """Turn GPS probing on/off; turning it on refreshes right away, not after interval."""
+        if enabled and not self.probe_gps:
+            self.probe_gps = True
+            self._wake_evt.set()
+        else:
+            self.probe_gps = enabled
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run, name="SensorCache", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        t, self._thread = self._thread, None
+        if t is None:
+            return
+        self._stop_evt.set()
+        self._wake_evt.set()
+        t.join(timeout=2.0)
+
+    def _run(self):
+        while not self._stop_evt.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.warning("Sensor refresh failed: %s", e)
+            self._wake_evt.wait(self.interval)
+            self._wake_evt.clear()
+
+
 def load_icon(path: str, size: int = 24) -> Image.Image:
     """Load PNG icon and resize."""
-    img = Image.open(path).convert("RGBA")
-    img = img.resize((size, size), Image.LANCZOS)
+    img = Image.open(path)
+    img.draft("RGB", (size, size))  # JPEG decodes straight at reduced scale; no-op for PNG
+    img = img.convert("RGBA").resize((size, size), ICON_RESAMPLE)
+    return _drop_opaque_alpha(img)
+
+
+def _drop_opaque_alpha(img: Image.Image) -> Image.Image:
+    """Fully opaque RGBA icon → RGB, so it is pasted as a plain copy without a mask."""
+    if img.getextrema()[3] == (255, 255):
+        return img.convert("RGB")
     return img
 
 
-def load_fonts():
-    """
-    Fonts:
-    - font_big   : time on screensaver
-    - font_small : date
-    - font_label : labels under icons / list items
-    """
-    try:
-        font_big = ImageFont.truetype(
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 60
-        )
-        font_small = ImageFont.truetype(
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 20
-        )
-        font_label = ImageFont.truetype(
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 15
-        )
-    except Exception:
-        font_big = ImageFont.load_default()
-        font_small = ImageFont.load_default()
-        font_label = ImageFont.load_default()
-    return font_big, font_small, font_label
+@functools.lru_cache(maxsize=8)
+def _highlight(w: int, h: int) -> Image.Image:
+    """Selection box w×h (dark fill, 1 px white outline), drawn once and pasted as a block."""
+    img = Image.new("RGB", (w, h), (40, 40, 40))
+    ImageDraw.Draw(img).rectangle([(0, 0), (w - 1, h - 1)], outline=(255, 255, 255), width=1)
+    return img
+
+
+def _paste_icon(image: Image.Image, icon: Image.Image, xy):
+    """Paste an icon; only icons that still have alpha go through the mask path."""
+    image.paste(icon, xy, icon if icon.mode == "RGBA" else None)
 
 
 def text_size(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.FreeTypeFont):
-    """Replacement for draw.textsize using textbbox (for new Pillow)."""
-    bbox = draw.textbbox((0, 0), text, font=font)
-    w = bbox[2] - bbox[0]
-    h = bbox[3] - bbox[1]
-    return w, h
+    """Replacement for draw.textsize using textbbox (for new Pillow); cached in core.fonts.measure."""
+    return measure(text, font)
+
+
+def _paste_text(image: Image.Image, xy, text: str, font: ImageFont.FreeTypeFont, fill):
+    """Same pixels as draw.text(xy, ...), but glyphs are rasterized once (core.fonts.text_mask)."""
+    paste_text(image, xy, text, font, fill)
+
+
+_meta_cache = {}  # path -> ((st_mtime_ns, st_size), parsed JSON)
+
+
+def load_meta(path: str) -> dict:
+    """
+    Parsed .meta.json / .app file, cached by path and mtime: revisiting a folder
+    re-parses only files that changed. Callers must not modify the returned dict.
+    Raises OSError if the file can't be read, ValueError if it isn't valid JSON.
+    """
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    hit = _meta_cache.get(path)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    with open(path, "rb") as f:
+        data = _json_loads(f.read())
+    _meta_cache[path] = (key, data)
+    return data
+
+
+@functools.lru_cache(maxsize=128)
+def get_icon(icon_name: str, size: int, fallback_name: str) -> Image.Image:
+    """
+    Menu icon from ICONS_DIR resized to size×size (fallback_name if it can't be read).
+    Decoded lazily on first draw and cached, so off-screen entries cost nothing.
+    """
+    for name in (icon_name, fallback_name):
+        try:
+            with Image.open(os.path.join(ICONS_DIR, name)) as img:
+                return _drop_opaque_alpha(img.convert("RGBA").resize((size, size), ICON_RESAMPLE))
+        except Exception:
+            continue
+    return Image.new("RGB", (size, size), (255, 255, 255))
 
 
 # ---------- Menu FS: root entries ----------
@@ -273,8 +447,7 @@ def load_root_menu_entries():
     {
       "path": "/.../menu_fs/01_apps",
       "display_name": "Apps",
-      "icon_name": "root_apps.png",
-      "icon_image": PIL.Image,
+      "icon_name": "root_apps.png",   # drawn via get_icon()
       "sort_priority": int
     }
     """
@@ -284,10 +457,13 @@ def load_root_menu_entries():
         logging.warning("MENU_FS_DIR does not exist: %s", MENU_FS_DIR)
         return entries
 
-    for name in sorted(os.listdir(MENU_FS_DIR)):
-        full = os.path.join(MENU_FS_DIR, name)
-        if not os.path.isdir(full):
-            continue
+    # scandir: is_dir() comes from the directory entry itself, no stat per name
+    with os.scandir(MENU_FS_DIR) as it:
+        dirs = sorted((e for e in it if e.is_dir()), key=lambda e: e.name)
+
+    for dent in dirs:
+        name = dent.name
+        full = dent.path
 
         meta_path = os.path.join(full, ".meta.json")
         display_name = name
@@ -295,36 +471,27 @@ def load_root_menu_entries():
         visible = True
         sort_priority = None
 
-        if os.path.isfile(meta_path):
-            try:
-                with open(meta_path, "r", encoding="utf-8") as f:
-                    meta = json.load(f)
-                display_name = meta.get("display_name", display_name)
-                icon_name = meta.get("icon")
-                visible = bool(meta.get("visible", True))
-                sort_priority = meta.get("sort_priority")
-            except Exception as e:
-                logging.warning("Failed to read meta for %s: %s", full, e)
+        # open() directly instead of isfile() + open(): one syscall when absent
+        try:
+            meta = load_meta(meta_path)
+            display_name = meta.get("display_name", display_name)
+            icon_name = meta.get("icon")
+            visible = bool(meta.get("visible", True))
+            sort_priority = meta.get("sort_priority")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning("Failed to read meta for %s: %s", full, e)
 
         if not visible:
             continue
 
         icon_file = icon_name or APP_DEFAULT_ICON_NAME
-        icon_path = os.path.join(ICONS_DIR, icon_file)
-        try:
-            icon_img = Image.open(icon_path).convert("RGBA")
-        except Exception:
-            default_path = os.path.join(ICONS_DIR, APP_DEFAULT_ICON_NAME)
-            try:
-                icon_img = Image.open(default_path).convert("RGBA")
-            except Exception:
-                icon_img = Image.new("RGBA", (48, 48), (255, 255, 255, 255))
 
         entries.append({
             "path": full,
             "display_name": display_name,
             "icon_name": icon_file,
-            "icon_image": icon_img,
             "sort_priority": sort_priority if sort_priority is not None else 9999,
         })
 
@@ -334,7 +501,34 @@ def load_root_menu_entries():
 
 # ---------- Menu FS: list view entries ----------
 
+_ls_cache = {}  # dir path -> (st_mtime_ns, entries)
+
+
+def _invalidate_listing(dir_path: str):
+    """Forget the cached listing of dir_path (after we changed something in it)."""
+    _ls_cache.pop(dir_path, None)
+
+
 def load_list_entries(dir_path: str):
+    """
+    Entries of dir_path for LIST_VIEW, cached by the directory's mtime: going
+    back into an unchanged folder costs one stat. Adding, removing or renaming
+    a name changes the mtime; our own edits of meta files inside it also call
+    _invalidate_listing(). Callers must not modify the returned list.
+    """
+    try:
+        mtime = os.stat(dir_path).st_mtime_ns
+    except OSError:
+        return []
+    hit = _ls_cache.get(dir_path)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    entries = _scan_list_entries(dir_path)
+    _ls_cache[dir_path] = (mtime, entries)
+    return entries
+
+
+def _scan_list_entries(dir_path: str):
     """
     Load list entries inside directory for LIST_VIEW.
     Returns list of:
@@ -342,8 +536,9 @@ def load_list_entries(dir_path: str):
       "type": "folder" | "app",
       "path": "/.../menu_fs/02_network/...",
       "display_name": "Wi-Fi",
-      "icon_image": PIL.Image,
-      "sort_priority": int
+      "icon_name": "wifi.png",        # drawn via get_icon()
+      "sort_priority": int,
+      "meta": dict | None             # parsed .app file (apps only), reused at launch
     }
     """
     entries = []
@@ -351,133 +546,131 @@ def load_list_entries(dir_path: str):
     if not os.path.isdir(dir_path):
         return entries
 
+    # one scandir pass for both folders and .app files; DirEntry.is_dir()/is_file()
+    # are answered from the directory entry, without a stat per name
+    with os.scandir(dir_path) as it:
+        dents = sorted(it, key=lambda e: e.name)
+
     # Folders
-    for name in sorted(os.listdir(dir_path)):
-        full = os.path.join(dir_path, name)
+    for dent in dents:
+        name = dent.name
+        full = dent.path
         if name == ".meta.json":
             continue
-        if os.path.isdir(full):
+        if dent.is_dir():
             meta_path = os.path.join(full, ".meta.json")
             display_name = name
             icon_name = FOLDER_ICON_NAME
             sort_priority = None
             visible = True
 
-            if os.path.isfile(meta_path):
-                try:
-                    with open(meta_path, "r", encoding="utf-8") as f:
-                        meta = json.load(f)
-                    display_name = meta.get("display_name", display_name)
-                    icon_name = meta.get("icon", FOLDER_ICON_NAME)
-                    visible = bool(meta.get("visible", True))
-                    sort_priority = meta.get("sort_priority")
-                except Exception as e:
-                    logging.warning("Failed to read subfolder meta: %s", e)
+            try:
+                meta = load_meta(meta_path)
+                display_name = meta.get("display_name", display_name)
+                icon_name = meta.get("icon", FOLDER_ICON_NAME)
+                visible = bool(meta.get("visible", True))
+                sort_priority = meta.get("sort_priority")
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.warning("Failed to read subfolder meta: %s", e)
 
             if not visible:
                 continue
 
-            icon_path = os.path.join(ICONS_DIR, icon_name)
-            try:
-                icon_img = Image.open(icon_path).convert("RGBA")
-            except Exception:
-                fallback_path = os.path.join(ICONS_DIR, FOLDER_ICON_NAME)
-                try:
-                    icon_img = Image.open(fallback_path).convert("RGBA")
-                except Exception:
-                    icon_img = Image.new("RGBA", (24, 24, 255, 255))
-
             entries.append({
                 "type": "folder",
                 "path": full,
                 "display_name": display_name,
-                "icon_image": icon_img,
+                "icon_name": icon_name,
                 "sort_priority": sort_priority if sort_priority is not None else 5000,
             })
 
     # .app files
-    for name in sorted(os.listdir(dir_path)):
-        full = os.path.join(dir_path, name)
-        if not os.path.isfile(full):
-            continue
+    for dent in dents:
+        name = dent.name
+        full = dent.path
         if not name.endswith(".app"):
             continue
+        if not dent.is_file():
+            continue
 
         display_name = os.path.splitext(name)[0]
         icon_name = APP_DEFAULT_ICON_NAME
         sort_priority = None
+        meta = None
 
         try:
-            with open(full, "r", encoding="utf-8") as f:
-                meta = json.load(f)
+            meta = load_meta(full)
             display_name = meta.get("name", display_name)
             icon_name = meta.get("icon", APP_DEFAULT_ICON_NAME)
             sort_priority = meta.get("sort_priority")
         except Exception as e:
             logging.warning("Failed to read .app meta for %s: %s", full, e)
 
-        icon_path = os.path.join(ICONS_DIR, icon_name)
-        try:
-            icon_img = Image.open(icon_path).convert("RGBA")
-        except Exception:
-            fallback_path = os.path.join(ICONS_DIR, APP_DEFAULT_ICON_NAME)
-            try:
-                icon_img = Image.open(fallback_path).convert("RGBA")
-            except Exception:
-                icon_img = Image.new("RGBA", (24, 24, 255, 255))
-
         entries.append({
             "type": "app",
             "path": full,
             "display_name": display_name,
-            "icon_image": icon_img,
+            "icon_name": icon_name,
             "sort_priority": sort_priority if sort_priority is not None else 9000,
+            "meta": meta,
         })
 
-    entries.sort(key=lambda e: (e["sort_priority"], e["display_name"].lower()))
+    entries.sort(key=_entry_sort_key)
     return entries
 
 
+def _entry_sort_key(entry):
+    # ties as in the scan: folders before apps, then by file name,
+    # so a list patched in memory sorts exactly like a fresh one
+    return (entry["sort_priority"], entry["display_name"].lower(),
+            entry["type"] != "folder", os.path.basename(entry["path"]))
+
+
 # ---------- Screensaver (clock + Wi-Fi/BT/GPS) ----------
 
-def draw_screensaver(wifi_icons, bt_icons, gps_icons, font_big, font_small):
-    """Draw screensaver with time/date and Wi-Fi/BT/GPS status."""
+def draw_screensaver(wifi_icons, bt_icons, gps_icons, font_big, font_small, sensors, tm=None):
+    """
+    Draw screensaver with time/date and Wi-Fi/BT/GPS status (from SensorCache).
+    tm: time.struct_time to show (the main loop passes the one it already has).
+    """
     width, height = SCREEN_WIDTH, SCREEN_HEIGHT
 
-    image = Image.new("RGB", (width, height), (0, 0, 0))
-    draw = ImageDraw.Draw(image)
+    image, draw = _clear_fb()
 
     bar_height = 30
     draw.line([(0, bar_height), (width, bar_height)], fill=(80, 80, 80), width=1)
 
     # Wi-Fi / BT
-    wifi_connected = is_wifi_connected()
-    bt_on = is_bluetooth_on()
+    wifi_connected = sensors.wifi
+    bt_on = sensors.bt
 
     wifi_icon = wifi_icons["on"] if wifi_connected else wifi_icons["off"]
     bt_icon = bt_icons["on"] if bt_on else bt_icons["off"]
 
-    image.paste(wifi_icon, (4, 3), wifi_icon)
-    image.paste(bt_icon, (36, 3), bt_icon)
+    _paste_icon(image, wifi_icon, (4, 3))
+    _paste_icon(image, bt_icon, (36, 3))
 
     # GPS: off / search / fix
     try:
-        gps_state = get_gps_state()              # "off" / "search" / "fix"
+        gps_state = sensors.gps_state            # "off" / "search" / "fix"
         gps_icon = gps_icons.get(gps_state) or gps_icons["off"]
-        image.paste(gps_icon, (68, 3), gps_icon)
+        _paste_icon(image, gps_icon, (68, 3))
     except Exception as e:
         # если вдруг что-то пошло не так — просто не рисуем GPS,
         # но не даём свалиться всей программе
         logging.warning("Failed to draw GPS icon: %s", e)
 
 
-    now = datetime.now()
-    hour_str = now.strftime("%H")
-    min_str = now.strftime("%M")
-    sec = now.second
+    if tm is None:
+        tm = time.localtime()
+    hour_str = f"{tm.tm_hour:02d}"
+    min_str = f"{tm.tm_min:02d}"
+    sec = tm.tm_sec
 
     time_str = f"{hour_str}:{min_str}"
-    date_str = now.strftime("%m/%d/%Y")
+    date_str = f"{tm.tm_mon:02d}/{tm.tm_mday:02d}/{tm.tm_year}"
 
     time_w, time_h = text_size(draw, time_str, font_big)
     date_w, date_h = text_size(draw, date_str, font_small)
@@ -488,73 +681,110 @@ def draw_screensaver(wifi_icons, bt_icons, gps_icons, font_big, font_small):
     date_x = (width - date_w) // 2
     date_y = time_y + time_h + 15
 
-    draw.text((time_x, time_y), time_str, font=font_big, fill=(255, 255, 255))
+    # "HH:MM" changes once a minute, the date once a day: cached glyph masks
+    _paste_text(image, (time_x, time_y), time_str, font_big, (255, 255, 255))
 
     if sec % 2 == 1:
         left_w, _ = text_size(draw, hour_str, font_big)
-        draw.text((time_x + left_w, time_y), ":", font=font_big, fill=(0, 0, 0))
+        _paste_text(image, (time_x + left_w, time_y), ":", font_big, (0, 0, 0))
 
-    draw.text((date_x, date_y), date_str, font=font_small, fill=(180, 180, 180))
+    _paste_text(image, (date_x, date_y), date_str, font_small, (180, 180, 180))
 
-    im_r = image.rotate(270)
-    disp.ShowImage(im_r)
+    # the colon blinks every second; only the clock band goes over SPI then
+    time_y1 = time_y + font_big.getbbox(time_str)[3]
+    date_y1 = date_y + font_small.getbbox(date_str)[3]
+    _push_blocks("screensaver", [
+        ("status", (wifi_connected, bt_on, sensors.gps_state), (0, 0, width, bar_height + 1)),
+        ("time", (time_str, sec % 2), (0, time_y, width, time_y1)),
+        ("date", date_str, (0, date_y, width, date_y1)),
+    ])
 
 
 # ---------- Main menu (3×2 grid, title HOME) ----------
 
-def draw_main_menu(entries, selected_index, font_label):
-    """Draw main menu 3×2 with title HOME."""
-    width, height = SCREEN_WIDTH, SCREEN_HEIGHT
-    image = Image.new("RGB", (width, height), (0, 0, 0))
-    draw = ImageDraw.Draw(image)
+_MENU_TOP_H = 30
+_MENU_ICON = 48
+_menu_layout_cache = [None, None]  # [key, cells]: root entries don't change at runtime
 
-    top_bar_h = 30
-    title = "HOME"
-    title_w, title_h = text_size(draw, title, font=font_label)
-    title_x = (width - title_w) // 2
-    title_y = (top_bar_h - title_h) // 2
-    draw.text((title_x, title_y), title, font=font_label, fill=(255, 255, 255))
 
-    draw.line([(0, top_bar_h), (width, top_bar_h)], fill=(80, 80, 80), width=1)
+def _menu_layout(entries, font_label):
+    """
+    Grid geometry of the 3×2 main menu, computed once per set of root entries:
+    [(label, icon_name, cell_box, icon_xy, label_xy), ...]
+    """
+    key = (tuple((e["display_name"], e["icon_name"]) for e in entries), font_label)
+    if _menu_layout_cache[0] == key:
+        return _menu_layout_cache[1]
 
+    width, height = SCREEN_WIDTH, SCREEN_HEIGHT
     cols = 3
     rows = 2
-    grid_h = height - top_bar_h
     col_w = width // cols
-    row_h = grid_h // rows
-
-    icon_size = 48
-
-    for idx, entry in enumerate(entries):
-        row = idx // cols
-        col = idx % cols
-        if row >= rows:
-            break
+    row_h = (height - _MENU_TOP_H) // rows
 
+    cells = []
+    for idx, (label, icon_name) in enumerate(key[0][:cols * rows]):
+        row, col = divmod(idx, cols)
         cell_x0 = col * col_w
-        cell_y0 = top_bar_h + row * row_h
+        cell_y0 = _MENU_TOP_H + row * row_h
         cell_x1 = cell_x0 + col_w
         cell_y1 = cell_y0 + row_h
 
         cx = (cell_x0 + cell_x1) // 2
         cy = (cell_y0 + cell_y1) // 2
+        label_w, label_h = measure(label, font_label)
 
-        icon = entry["icon_image"].resize((icon_size, icon_size), Image.LANCZOS)
+        total_h = _MENU_ICON + 4 + label_h
+        icon_y = cy - total_h // 2
+        icon_xy = (cx - _MENU_ICON // 2, icon_y)
+        label_xy = (cx - label_w // 2, icon_y + _MENU_ICON + 4)
+        cells.append((label, icon_name, (cell_x0, cell_y0, cell_x1, cell_y1), icon_xy, label_xy))
 
-        label = entry["display_name"]
-        label_w, label_h = text_size(draw, label, font=font_label)
+    _menu_layout_cache[:] = [key, cells]
+    return cells
 
-        total_h = icon_size + 4 + label_h
-        icon_y = cy - total_h // 2
-        icon_x = cx - icon_size // 2
-        label_x = cx - label_w // 2
-        label_y = icon_y + icon_size + 4
 
-        image.paste(icon, (icon_x, icon_y), icon)
-        draw.text((label_x, label_y), label, font=font_label, fill=(255, 255, 255))
+def draw_main_menu(entries, selected_index, font_label):
+    """Draw main menu 3×2 with title HOME."""
+    width = SCREEN_WIDTH
+    top_bar_h = _MENU_TOP_H
+    title = "HOME"
+    cells = _menu_layout(entries, font_label)
+
+    blocks = [("title", title, (0, 0, width, top_bar_h + 1))]
+    for idx, (label, icon_name, box, _, _) in enumerate(cells):
+        # selection change → only the old and the new cell are recomposed and sent
+        blocks.append((f"cell{idx}", (label, icon_name, idx == selected_index), box))
+
+    # while the menu stays on screen _FB still holds its last frame
+    prev = _shown["blocks"] if _shown["screen"] == "main_menu" else None
+    full = prev is None or len(prev) != len(blocks)
+    separator = [(0, top_bar_h), (width, top_bar_h)]
+    if full:
+        image, draw = _clear_fb()
+        title_w, title_h = text_size(draw, title, font=font_label)
+        _paste_text(image, ((width - title_w) // 2, (top_bar_h - title_h) // 2), title, font_label, (255, 255, 255))
+        draw.line(separator, fill=(80, 80, 80), width=1)
+    else:
+        image, draw = _FB, _FB_DRAW
 
-        if idx == selected_index:
+    for idx, (label, icon_name, box, icon_xy, label_xy) in enumerate(cells):
+        name, sig, _ = blocks[idx + 1]
+        if not full:
+            if prev.get(name) == sig:
+                continue
+            # row 0 cells start on the separator line
+            image.paste((0, 0, 0), box)
+            if box[1] == top_bar_h:
+                draw.line([(box[0], top_bar_h), (box[2] - 1, top_bar_h)], fill=(80, 80, 80), width=1)
+
+        icon = get_icon(icon_name, _MENU_ICON, APP_DEFAULT_ICON_NAME)
+        _paste_icon(image, icon, icon_xy)
+        _paste_text(image, label_xy, label, font_label, (255, 255, 255))
+
+        if sig[2]:
             margin = 4
+            cell_x0, cell_y0, cell_x1, cell_y1 = box
             draw.rectangle(
                 [
                     cell_x0 + margin,
@@ -566,12 +796,30 @@ def draw_main_menu(entries, selected_index, font_label):
                 width=2,
             )
 
-    im_r = image.rotate(270)
-    disp.ShowImage(im_r)
+    _push_blocks("main_menu", blocks)
 
 
 # ---------- List view (LIST_VIEW) ----------
 
+def _draw_list_row(image, draw, entry, y0, row_h, selected, font_label):
+    """One list row (highlight, icon, label) at y0."""
+    width = SCREEN_WIDTH
+    if selected:
+        image.paste(_highlight(width, row_h), (0, y0))
+
+    icon_size = 20
+    fallback = FOLDER_ICON_NAME if entry["type"] == "folder" else APP_DEFAULT_ICON_NAME
+    icon = get_icon(entry["icon_name"], icon_size, fallback)
+    icon_x = 4
+    icon_y = y0 + (row_h - icon_size) // 2
+    _paste_icon(image, icon, (icon_x, icon_y))
+
+    label = entry["display_name"]
+    label_x = icon_x + icon_size + 6
+    label_y = y0 + (row_h - font_label.size) // 2
+    _paste_text(image, (label_x, label_y), label, font_label, (255, 255, 255))
+
+
 def draw_list_view(entries, selected_index, scroll_offset, folder_name, font_label):
     """
     Draw list view of current folder.
@@ -579,64 +827,68 @@ def draw_list_view(entries, selected_index, scroll_offset, folder_name, font_lab
     Body: rows with icons + labels
     """
     width, height = SCREEN_WIDTH, SCREEN_HEIGHT
-    image = Image.new("RGB", (width, height), (0, 0, 0))
-    draw = ImageDraw.Draw(image)
-
     top_bar_h = 30
-    title = folder_name
-    hint = "KEY2: OPT"
-    title_w, title_h = text_size(draw, title, font=font_label)
-    hint_w, hint_h = text_size(draw, hint, font=font_label)
-
-    title_x = 4
-    title_y = (top_bar_h - title_h) // 2
-    draw.text((title_x, title_y), title, font=font_label, fill=(255, 255, 255))
-
-    hint_x = width - hint_w - 4
-    hint_y = (top_bar_h - hint_h) // 2
-    draw.text((hint_x, hint_y), hint, font=font_label, fill=(180, 180, 180))
-
-    draw.line([(0, top_bar_h), (width, top_bar_h)], fill=(80, 80, 80), width=1)
-
     row_h = 30
     max_rows = (height - top_bar_h) // row_h
-
-    if not entries:
-        msg = "Empty"
-        msg_w, msg_h = text_size(draw, msg, font=font_label)
-        x = (width - msg_w) // 2
-        y = top_bar_h + (height - top_bar_h - msg_h) // 2
-        draw.text((x, y), msg, font=font_label, fill=(180, 180, 180))
+    start = scroll_offset
+    end = min(start + max_rows, len(entries)) if entries else start
+
+    row_sigs = [None] * max_rows
+    for row, idx in enumerate(range(start, end)):
+        entry = entries[idx]
+        row_sigs[row] = (entry["display_name"], entry["icon_name"], entry["type"], idx == selected_index)
+
+    blocks = [
+        ("top", folder_name, (0, 0, width, top_bar_h + 1)),
+        ("empty", not entries, (0, top_bar_h + 1, width, height)),
+    ]
+    for row, sig in enumerate(row_sigs):
+        y0 = top_bar_h + row * row_h
+        blocks.append((f"row{row}", sig, (0, y0, width, y0 + row_h)))
+
+    # while the list stays on screen _FB still holds its last frame: moving the
+    # cursor without scrolling recomposes (and sends) only the two affected rows
+    prev = _shown["blocks"] if _shown["screen"] == "list_view" else None
+    full = prev is None or prev.get("empty") != (not entries)
+    if full:
+        image, draw = _clear_fb()
     else:
-        icon_size = 20
-        start = scroll_offset
-        end = min(start + max_rows, len(entries))
+        image, draw = _FB, _FB_DRAW
 
-        for row, idx in enumerate(range(start, end)):
-            entry = entries[idx]
-            y0 = top_bar_h + row * row_h
-            y1 = y0 + row_h
+    if full or prev.get("top") != folder_name:
+        if not full:
+            image.paste((0, 0, 0), (0, 0, width, top_bar_h))
+        hint = "KEY2: OPT"
+        title_w, title_h = text_size(draw, folder_name, font=font_label)
+        hint_w, hint_h = text_size(draw, hint, font=font_label)
+        _paste_text(image, (4, (top_bar_h - title_h) // 2), folder_name, font_label, (255, 255, 255))
+        _paste_text(image, (width - hint_w - 4, (top_bar_h - hint_h) // 2), hint, font_label, (180, 180, 180))
 
-            if idx == selected_index:
-                draw.rectangle(
-                    [(0, y0), (width - 1, y1 - 1)],
-                    fill=(40, 40, 40),
-                    outline=(255, 255, 255),
-                    width=1,
-                )
+    separator = [(0, top_bar_h), (width, top_bar_h)]
+    if full:
+        draw.line(separator, fill=(80, 80, 80), width=1)
 
-            icon = entry["icon_image"].resize((icon_size, icon_size), Image.LANCZOS)
-            icon_x = 4
-            icon_y = y0 + (row_h - icon_size) // 2
-            image.paste(icon, (icon_x, icon_y), icon)
-
-            label = entry["display_name"]
-            label_x = icon_x + icon_size + 6
-            label_y = y0 + (row_h - font_label.size) // 2
-            draw.text((label_x, label_y), label, font=font_label, fill=(255, 255, 255))
+    if not entries:
+        if full:
+            msg = "Empty"
+            msg_w, msg_h = text_size(draw, msg, font=font_label)
+            x = (width - msg_w) // 2
+            y = top_bar_h + (height - top_bar_h - msg_h) // 2
+            _paste_text(image, (x, y), msg, font_label, (180, 180, 180))
+    else:
+        for row, sig in enumerate(row_sigs):
+            if not full and prev.get(f"row{row}") == sig:
+                continue
+            y0 = top_bar_h + row * row_h
+            if not full:
+                # row 0 starts on the separator line (the highlight covers it)
+                image.paste((0, 0, 0), (0, y0, width, y0 + row_h))
+                if row == 0:
+                    draw.line(separator, fill=(80, 80, 80), width=1)
+            if sig is not None:
+                _draw_list_row(image, draw, entries[start + row], y0, row_h, sig[3], font_label)
 
-    im_r = image.rotate(270)
-    disp.ShowImage(im_r)
+    _push_blocks("list_view", blocks)
 
 
 # ---------- Options menu (OPTIONS_MENU) ----------
@@ -652,76 +904,86 @@ OPTIONS_ITEMS = [
 def draw_options_menu(selected_index, font_label):
     """Simple modal options menu."""
     width, height = SCREEN_WIDTH, SCREEN_HEIGHT
-    image = Image.new("RGB", (width, height), (0, 0, 0))
-    draw = ImageDraw.Draw(image)
+    image, draw = _clear_fb()
 
     title = "OPTIONS"
     title_w, title_h = text_size(draw, title, font=font_label)
     title_x = (width - title_w) // 2
     title_y = 4
-    draw.text((title_x, title_y), title, font=font_label, fill=(255, 255, 255))
+    _paste_text(image, (title_x, title_y), title, font_label, (255, 255, 255))
 
     top = title_y + title_h + 4
     row_h = 24
+    blocks = []
 
     for idx, txt in enumerate(OPTIONS_ITEMS):
         y0 = top + idx * row_h
         y1 = y0 + row_h
 
         if idx == selected_index:
-            draw.rectangle(
-                [(4, y0), (width - 4, y1 - 2)],
-                fill=(40, 40, 40),
-                outline=(255, 255, 255),
-                width=1,
-            )
+            # same box as draw.rectangle([(4, y0), (width - 4, y1 - 2)]), pasted whole
+            image.paste(_highlight(width - 7, row_h - 1), (4, y0))
 
         txt_w, txt_h = text_size(draw, txt, font=font_label)
         x = (width - txt_w) // 2
         y = y0 + (row_h - txt_h) // 2
-        draw.text((x, y), txt, font=font_label, fill=(255, 255, 255))
+        _paste_text(image, (x, y), txt, font_label, (255, 255, 255))
+        blocks.append((f"item{idx}", idx == selected_index, (0, y0, width, y1)))
 
     hint = "UP/DOWN, CENTER=OK, KEY3=BACK"
     hint_w, hint_h = text_size(draw, hint, font=font_label)
     hint_x = (width - hint_w) // 2
     hint_y = height - hint_h - 4
-    draw.text((hint_x, hint_y), hint, font=font_label, fill=(180, 180, 180))
+    _paste_text(image, (hint_x, hint_y), hint, font_label, (180, 180, 180))
 
-    im_r = image.rotate(270)
-    disp.ShowImage(im_r)
+    _push_blocks("options_menu", blocks)
 
 
 # ---------- Options actions (filesystem changes) ----------
 
+def _unique_name(parent: str, base: str, suffix: str = ""):
+    """
+    First name not taken in parent among base+suffix, base_1+suffix, ...
+    (None after 1000 tries). One listdir instead of an exists() stat per candidate.
+    """
+    try:
+        existing = set(os.listdir(parent))
+    except OSError:
+        existing = set()
+    for i in range(0, 1000):
+        candidate = (base if i == 0 else f"{base}_{i}") + suffix
+        if candidate not in existing:
+            return candidate
+    return None
+
+
 def create_folder_named(current_dir: str, display_name: str):
-    """Create folder with user-defined display name + .meta.json."""
+    """
+    Create folder with user-defined display name + .meta.json.
+    Returns its list entry (as load_list_entries would build it), or None.
+    """
     display_name = (display_name or "").strip()
     if not display_name:
         logging.info("Empty folder name, skipping create")
-        return
+        return None
+    _invalidate_listing(current_dir)
 
     safe_name = sanitize_fs_name(display_name)
     if not safe_name:
         safe_name = "Folder"
 
-    base_fs = safe_name
-    new_path = None
-    for i in range(0, 1000):
-        candidate = base_fs if i == 0 else f"{base_fs}_{i}"
-        path = os.path.join(current_dir, candidate)
-        if not os.path.exists(path):
-            new_path = path
-            break
+    candidate = _unique_name(current_dir, safe_name)
+    new_path = os.path.join(current_dir, candidate) if candidate else None
 
     if new_path is None:
         logging.warning("Could not create new folder, limit reached")
-        return
+        return None
 
     try:
         os.makedirs(new_path, exist_ok=True)
     except Exception as e:
         logging.warning("Failed to create folder %s: %s", new_path, e)
-        return
+        return None
 
     meta_path = os.path.join(new_path, ".meta.json")
     meta = {
@@ -731,147 +993,166 @@ def create_folder_named(current_dir: str, display_name: str):
         "sort_priority": 5000,
     }
     try:
-        with open(meta_path, "w", encoding="utf-8") as f:
-            json.dump(meta, f, indent=2)
+        with open(meta_path, "wb") as f:
+            f.write(_json_dumps(meta))
     except Exception as e:
         logging.warning("Failed to write folder meta: %s", e)
+        return None
 
     logging.info("Created folder: %s (display: %s)", new_path, display_name)
+    return {
+        "type": "folder",
+        "path": new_path,
+        "display_name": display_name,
+        "icon_name": FOLDER_ICON_NAME,
+        "sort_priority": 5000,
+    }
 
 
-def delete_entry(entry):
-    """Delete folder (recursive) or app file."""
+def delete_entry(entry) -> bool:
+    """Delete folder (recursive) or app file. True if it is gone."""
     path = entry["path"]
+    _invalidate_listing(os.path.dirname(path))
     if entry["type"] == "folder":
+        # shutil pulls in zlib/bz2/lzma; only deleting a folder needs it
+        import shutil
+
         try:
             shutil.rmtree(path)
             logging.info("Deleted folder: %s", path)
+            return True
         except Exception as e:
             logging.warning("Failed to delete folder %s: %s", path, e)
     elif entry["type"] == "app":
         try:
             os.remove(path)
             logging.info("Deleted app: %s", path)
+            return True
         except Exception as e:
             logging.warning("Failed to delete app %s: %s", path, e)
+    return False
+
+
+# everything outside this set is dropped from filesystem names; a regex
+# (rather than a str.translate table) also removes non-Latin-1 letters like Cyrillic
+_FS_UNSAFE_RE = re.compile(r"[^A-Za-z0-9_-]+")
 
 
 def sanitize_fs_name(name: str) -> str:
     """Make safe filesystem name from user input."""
-    name = name.strip()
-    if not name:
-        return ""
-    # replace spaces with underscores
-    name = name.replace(" ", "_")
-    # allow only limited set of chars
-    allowed = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-"
-    safe = "".join(ch for ch in name if ch in allowed)
-    return safe
+    # spaces become underscores, then one C-level pass drops the rest
+    return _FS_UNSAFE_RE.sub("", name.strip().replace(" ", "_"))
 
 
-def rename_entry(entry, new_display_name: str):
+def rename_entry(entry, new_display_name: str) -> bool:
     """
     Rename folder or app file on disk and update meta.
     new_display_name is what user typed (can contain spaces).
+    True if entry (path, display_name) now matches the disk exactly,
+    so the caller can keep its list instead of re-reading the folder.
     """
     path = entry["path"]
     parent = os.path.dirname(path)
+    _invalidate_listing(parent)
     display_name = new_display_name.strip()
     if not display_name:
         logging.info("Empty new name, skipping rename")
-        return
+        return False
 
     if entry["type"] == "folder":
         safe_name = sanitize_fs_name(display_name)
         if not safe_name:
             logging.info("Sanitized folder name is empty, skipping rename")
-            return
+            return False
 
-        new_path = os.path.join(parent, safe_name)
         # avoid overwrite
-        if os.path.exists(new_path):
-            for i in range(1, 1000):
-                candidate = f"{safe_name}_{i}"
-                candidate_path = os.path.join(parent, candidate)
-                if not os.path.exists(candidate_path):
-                    new_path = candidate_path
-                    break
+        candidate = _unique_name(parent, safe_name)
+        new_path = os.path.join(parent, candidate or safe_name)
 
         try:
             os.rename(path, new_path)
         except Exception as e:
             logging.warning("Failed to rename folder %s -> %s: %s", path, new_path, e)
-            return
+            return False
 
         meta_path = os.path.join(new_path, ".meta.json")
         meta = {}
         if os.path.isfile(meta_path):
             try:
-                with open(meta_path, "r", encoding="utf-8") as f:
-                    meta = json.load(f)
+                with open(meta_path, "rb") as f:
+                    meta = _json_loads(f.read())
             except Exception:
                 meta = {}
         meta["display_name"] = display_name
+        written = True
         try:
-            with open(meta_path, "w", encoding="utf-8") as f:
-                json.dump(meta, f, indent=2)
+            with open(meta_path, "wb") as f:
+                f.write(_json_dumps(meta))
         except Exception as e:
             logging.warning("Failed to write meta after folder rename: %s", e)
+            written = False
 
         entry["path"] = new_path
         entry["display_name"] = display_name
         logging.info("Renamed folder to: %s (display: %s)", new_path, display_name)
+        return written
 
     elif entry["type"] == "app":
         safe_name = sanitize_fs_name(display_name)
         if not safe_name:
             logging.info("Sanitized app name is empty, skipping rename")
-            return
+            return False
 
-        new_file = safe_name + ".app"
-        new_path = os.path.join(parent, new_file)
-        if os.path.exists(new_path):
-            for i in range(1, 1000):
-                candidate = f"{safe_name}_{i}.app"
-                candidate_path = os.path.join(parent, candidate)
-                if not os.path.exists(candidate_path):
-                    new_path = candidate_path
-                    break
+        candidate = _unique_name(parent, safe_name, ".app")
+        new_path = os.path.join(parent, candidate or safe_name + ".app")
 
         try:
             os.rename(path, new_path)
         except Exception as e:
             logging.warning("Failed to rename app %s -> %s: %s", path, new_path, e)
-            return
+            return False
 
         meta = {}
         try:
-            with open(new_path, "r", encoding="utf-8") as f:
-                meta = json.load(f)
+            with open(new_path, "rb") as f:
+                meta = _json_loads(f.read())
         except Exception:
             meta = {}
         meta["name"] = display_name
+        written = True
         try:
-            with open(new_path, "w", encoding="utf-8") as f:
-                json.dump(meta, f, indent=2)
+            with open(new_path, "wb") as f:
+                f.write(_json_dumps(meta))
         except Exception as e:
             logging.warning("Failed to write app meta after rename: %s", e)
+            written = False
 
         entry["path"] = new_path
         entry["display_name"] = display_name
+        entry["meta"] = meta
         logging.info("Renamed app to: %s (display: %s)", new_path, display_name)
+        return written
+
+    return False
 
 
 # ---------- Run .app (console commands) ----------
 
+APP_TIMEOUT_S = 20.0  # .app command is killed after this many seconds
+
+_app_proc = None  # running .app command (subprocess.Popen) or None
+
+
 def run_app(entry):
-    """Run .app file command and fill console_lines with its output."""
-    global console_lines, console_scroll
+    """
+    Start .app file command; its output is streamed into console_lines by a
+    reader thread, so the UI (scrolling, KEY3) stays responsive meanwhile.
+    """
+    global console_lines, console_scroll, _app_proc
 
     path = entry["path"]
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            meta = json.load(f)
+        meta = load_meta(path)
     except Exception as e:
         console_lines = [f"ERROR: cannot read .app: {e}"]
         console_scroll = 0
@@ -885,59 +1166,413 @@ def run_app(entry):
 
     logging.info("Running app command: %s", cmd)
 
+    stop_app()
+    lines = []
+    console_lines = lines
+    console_scroll = 0
     try:
-        output = subprocess.check_output(
-            cmd, stderr=subprocess.STDOUT, shell=True, timeout=20
+        # own process group: killing it also stops children of the shell,
+        # which would otherwise keep the output pipe open
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True,
+            start_new_session=True,
         )
-        text = output.decode("utf-8", errors="ignore")
-    except subprocess.CalledProcessError as e:
-        text = e.output.decode("utf-8", errors="ignore")
     except Exception as e:
-        text = str(e)
+        lines.append(str(e))
+        return
+
+    _app_proc = proc
+    threading.Thread(
+        target=_pump_app_output, args=(proc, lines), name="app-output", daemon=True
+    ).start()
 
-    console_lines = text.splitlines()
-    console_scroll = 0
+
+def _pump_app_output(proc, lines):
+    """Reader thread: append command output to lines (list.append is atomic)."""
+    timed_out = threading.Event()
+
+    def on_timeout():
+        timed_out.set()
+        _kill_app(proc)
+
+    timer = threading.Timer(APP_TIMEOUT_S, on_timeout)
+    timer.start()
+    try:
+        for raw in proc.stdout:
+            lines.extend(raw.decode("utf-8", errors="ignore").splitlines() or [""])
+            hw.wake()  # the console redraws on new lines, not on a timer
+        proc.wait()
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+    if timed_out.is_set():
+        lines.append(f"ERROR: killed after {APP_TIMEOUT_S:.0f} s")
+        hw.wake()
+
+
+def _kill_app(proc):
+    if proc.poll() is None:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def stop_app():
+    """Terminate the running .app command, if any."""
+    global _app_proc
+    proc, _app_proc = _app_proc, None
+    if proc is not None:
+        _kill_app(proc)
 
 
 # ---------- Input handling (joystick + 3 keys) ----------
 
 def read_buttons(prev_states):
     """
-    Read GPIO buttons via disp.digital_read(...).
+    Read GPIO buttons: one GPLEV0 register read for all pins (hw.read_mask),
+    per-pin disp.digital_read(...) only where /dev/gpiomem is unavailable.
     Returns (event, new_states).
     event: 'UP','DOWN','LEFT','RIGHT','CENTER','KEY1','KEY2','KEY3' or None
-    Event is generated only on 1 -> 0 transition (press).
+    Event is generated only on 1 -> 0 transition (press), once the pin has
+    been stable for BUTTON_DEBOUNCE_S.
     """
-    pins = {
-        "UP": disp.GPIO_KEY_UP_PIN,
-        "DOWN": disp.GPIO_KEY_DOWN_PIN,
-        "LEFT": disp.GPIO_KEY_LEFT_PIN,
-        "RIGHT": disp.GPIO_KEY_RIGHT_PIN,
-        "CENTER": disp.GPIO_KEY_PRESS_PIN,
-        "KEY1": disp.GPIO_KEY1_PIN,
-        "KEY2": disp.GPIO_KEY2_PIN,
-        "KEY3": disp.GPIO_KEY3_PIN,
-    }
+    return core_read_buttons(hw, prev_states, debounce_s=BUTTON_DEBOUNCE_S)
+
+
+# ---------- UI state machine ----------
+
+class UIContext:
+    """Mutable UI state of main(), shared by the per-state event handlers."""
+
+    __slots__ = (
+        "fonts", "monitor", "root_entries", "selected_root_index",
+        "current_dir", "current_dir_name", "list_entries", "selected_list_index", "list_scroll",
+        "current_app", "current_app_module", "selected_option_index",
+        "keyboard", "keyboard_mode", "keyboard_target", "dirty",
+    )
+
+    def __init__(self, fonts, monitor, root_entries, keyboard):
+        self.fonts = fonts                  # (font_big, font_small, font_label)
+        self.monitor = monitor
+        self.root_entries = root_entries
+        self.selected_root_index = 0
+
+        # List view state
+        self.current_dir = None
+        self.current_dir_name = ""
+        self.list_entries = []
+        self.selected_list_index = 0
+        self.list_scroll = 0
+
+        self.current_app = None
+        self.current_app_module = None
+
+        # Options menu state
+        self.selected_option_index = 0
 
-    new_states = {}
-    event = None
+        # Keyboard state
+        self.keyboard = keyboard
+        self.keyboard_mode = None      # "rename" | "new_folder" | None
+        self.keyboard_target = None    # entry dict for rename (or None)
 
-    for name, pin in pins.items():
-        val = disp.digital_read(pin)
-        new_states[name] = val
-        prev = prev_states.get(name, 1)
-        if prev == 1 and val == 0 and event is None:
-            event = name
+        self.dirty = True  # the current screen must be redrawn
 
-    return event, new_states
+    def leave_app(self):
+        """Stop the running app (its on_exit() ends background work) and forget it."""
+        app = self.current_app
+        self.current_app = None
+        self.current_app_module = None
+        if app is not None and hasattr(app, "on_exit"):
+            app.on_exit()
+
+    def open_dir(self, path, display_name):
+        self.current_dir = path
+        self.current_dir_name = display_name
+        self.list_entries = load_list_entries(path)
+        self.selected_list_index = 0
+        self.list_scroll = 0
+
+    def reload_dir(self, entries=None):
+        """
+        Show entries after a change (already patched by the caller), or
+        re-read current_dir if None; keeps the selection in range.
+        """
+        if entries is None:
+            if not self.current_dir:
+                return
+            entries = load_list_entries(self.current_dir)
+        self.list_entries = entries
+        if self.selected_list_index >= len(entries):
+            self.selected_list_index = max(0, len(entries) - 1)
+        self.list_scroll = min(self.list_scroll, self.selected_list_index)
+
+
+# Event handlers: handler(ctx, event) -> new state, or None to stay.
+# A state change always redraws the new screen; handlers that change
+# the current screen set ctx.dirty themselves.
+
+def _go_main_menu(ctx, event):
+    return STATE_MAIN_MENU
+
+
+def _go_screensaver(ctx, event):
+    return STATE_SCREENSAVER
+
+
+def _go_list_view(ctx, event):
+    return STATE_LIST_VIEW
+
+
+def _app_event(ctx, event):
+    app = ctx.current_app
+    if app is None or app.on_event(event) != "exit":
+        return None
+    ctx.leave_app()
+    return STATE_LIST_VIEW
+
+
+def _menu_move(ctx, event):
+    if not ctx.root_entries:
+        return None
+    rows = 2
+    cols = 3
+    row, col = divmod(ctx.selected_root_index, cols)
+
+    if event == "UP" and row > 0:
+        row -= 1
+    elif event == "DOWN" and row < rows - 1:
+        row += 1
+    elif event == "LEFT" and col > 0:
+        col -= 1
+    elif event == "RIGHT" and col < cols - 1:
+        col += 1
+
+    new_idx = row * cols + col
+    if new_idx < len(ctx.root_entries) and new_idx != ctx.selected_root_index:
+        ctx.selected_root_index = new_idx
+        ctx.dirty = True
+    return None
+
+
+def _menu_enter(ctx, event):
+    if not 0 <= ctx.selected_root_index < len(ctx.root_entries):
+        return None
+    entry = ctx.root_entries[ctx.selected_root_index]
+    ctx.open_dir(entry["path"], entry["display_name"])
+    logging.info("Enter LIST_VIEW: %s", ctx.current_dir_name)
+    return STATE_LIST_VIEW
+
+
+def _list_move(ctx, event):
+    if not ctx.list_entries:
+        return None
+    row_h = 30
+    max_rows = (SCREEN_HEIGHT - 30) // row_h
+    if event == "UP" and ctx.selected_list_index > 0:
+        ctx.selected_list_index -= 1
+        if ctx.selected_list_index < ctx.list_scroll:
+            ctx.list_scroll = ctx.selected_list_index
+        ctx.dirty = True
+    elif event == "DOWN" and ctx.selected_list_index < len(ctx.list_entries) - 1:
+        ctx.selected_list_index += 1
+        if ctx.selected_list_index >= ctx.list_scroll + max_rows:
+            ctx.list_scroll = ctx.selected_list_index - max_rows + 1
+        ctx.dirty = True
+    return None
+
+
+def _list_open(ctx, event):
+    global console_scroll
+
+    if not ctx.list_entries:
+        return None
+    item = ctx.list_entries[ctx.selected_list_index]
+    if item["type"] == "folder":
+        ctx.open_dir(item["path"], item["display_name"])
+        ctx.dirty = True
+        logging.info("Enter subfolder: %s", ctx.current_dir_name)
+        return None
+    if item["type"] != "app":
+        return None
+
+    # parsed when the folder was listed; re-read only if that failed
+    meta = item.get("meta")
+    if meta is None:
+        try:
+            meta = load_meta(item["path"])
+        except Exception as e:
+            logging.warning("Failed to read app meta %s: %s", item["path"], e)
+            return None
+
+    module_name = meta.get("module")
+    if module_name:
+        app = load_app(module_name, hw, ctx.fonts, ctx.monitor)
+        if app is None:
+            logging.warning("Failed to init app %s", module_name)
+            return None
+        ctx.current_app = app
+        ctx.current_app_module = module_name
+        if hasattr(app, "on_enter"):
+            app.on_enter()
+        return STATE_APP
+
+    if meta.get("exec"):
+        run_app(item)
+        console_scroll = 0
+        return STATE_CONSOLE
+    return None
+
+
+def _open_options(ctx, event):
+    ctx.selected_option_index = 0
+    logging.info("Open OPTIONS_MENU")
+    return STATE_OPTIONS_MENU
+
+
+def _options_move(ctx, event):
+    max_idx = len(OPTIONS_ITEMS) - 1
+    if event == "UP" and ctx.selected_option_index > 0:
+        ctx.selected_option_index -= 1
+        ctx.dirty = True
+    elif event == "DOWN" and ctx.selected_option_index < max_idx:
+        ctx.selected_option_index += 1
+        ctx.dirty = True
+    return None
+
+
+def _options_choose(ctx, event):
+    choice = OPTIONS_ITEMS[ctx.selected_option_index]
+    logging.info("OPTIONS choice: %s", choice)
+
+    if choice == "Back":
+        return STATE_LIST_VIEW
+
+    if choice == "Create folder":
+        if not ctx.current_dir:
+            return None
+        ctx.keyboard_mode = KB_MODE_NEW_FOLDER
+        ctx.keyboard_target = None
+        ctx.keyboard.start("New folder", initial_text="", max_len=64)
+        return STATE_KEYBOARD
+
+    if choice == "Delete":
+        if ctx.list_entries:
+            item = ctx.list_entries[ctx.selected_list_index]
+            if delete_entry(item):
+                # what is left is still sorted — no need to re-read the folder
+                ctx.reload_dir([e for e in ctx.list_entries if e is not item])
+            else:
+                ctx.reload_dir()
+        return STATE_LIST_VIEW
+
+    if choice == "Rename":
+        if not ctx.list_entries:
+            return STATE_LIST_VIEW
+        ctx.keyboard_mode = KB_MODE_RENAME
+        ctx.keyboard_target = ctx.list_entries[ctx.selected_list_index]
+        initial = ctx.keyboard_target["display_name"]
+        ctx.keyboard.start("Rename", initial_text=initial, max_len=64)
+        logging.info("Open KEYBOARD for rename: %s", initial)
+        return STATE_KEYBOARD
+
+    return None
+
+
+def _keyboard_cancel(ctx, event):
+    ctx.keyboard_mode = None
+    ctx.keyboard_target = None
+    return STATE_LIST_VIEW
+
+
+def _keyboard_language(ctx, event):
+    ctx.keyboard.cycle_language()
+    ctx.dirty = True
+    return None
+
+
+def _keyboard_commit(ctx, text):
+    # a successful rename/create is patched into the list in memory;
+    # anything else falls back to re-reading the folder
+    entries = None
+    if ctx.keyboard_mode == KB_MODE_RENAME and ctx.keyboard_target and text is not None:
+        if rename_entry(ctx.keyboard_target, text):
+            entries = sorted(ctx.list_entries, key=_entry_sort_key)
+    elif ctx.keyboard_mode == KB_MODE_NEW_FOLDER and ctx.current_dir and text is not None:
+        created = create_folder_named(ctx.current_dir, text)
+        if created is not None:
+            entries = sorted(ctx.list_entries + [created], key=_entry_sort_key)
+    ctx.reload_dir(entries)
+    return _keyboard_cancel(ctx, None)
+
+
+def _keyboard_submit(ctx, event):
+    return _keyboard_commit(ctx, ctx.keyboard.text)
+
+
+def _keyboard_key(ctx, event):
+    action, text = ctx.keyboard.handle_event(event)
+    if action == "redraw":
+        ctx.dirty = True
+    elif action == "done":
+        return _keyboard_commit(ctx, text)
+    return None
+
+
+def _console_close(ctx, event):
+    stop_app()
+    return STATE_LIST_VIEW
+
+
+def _console_scroll(ctx, event):
+    global console_scroll
+
+    if event == "UP" and console_scroll > 0:
+        console_scroll -= 1
+        ctx.dirty = True
+    elif event == "DOWN" and console_scroll < max(0, len(console_lines) - 1):
+        console_scroll += 1
+        ctx.dirty = True
+    return None
+
+
+# state -> {event: handler}; the None key catches any other event
+STATE_HANDLERS = {
+    STATE_SCREENSAVER: {None: _go_main_menu},
+    STATE_APP: {None: _app_event},
+    STATE_MAIN_MENU: {
+        "KEY3": _go_screensaver,
+        "UP": _menu_move, "DOWN": _menu_move, "LEFT": _menu_move, "RIGHT": _menu_move,
+        "CENTER": _menu_enter,
+    },
+    STATE_LIST_VIEW: {
+        "KEY3": _go_main_menu,
+        "UP": _list_move, "DOWN": _list_move,
+        "CENTER": _list_open,
+        "KEY2": _open_options,
+    },
+    STATE_OPTIONS_MENU: {
+        "KEY3": _go_list_view,
+        "UP": _options_move, "DOWN": _options_move,
+        "CENTER": _options_choose,
+    },
+    STATE_KEYBOARD: {
+        "KEY3": _keyboard_cancel,
+        "KEY1": _keyboard_language,
+        "KEY2": _keyboard_submit,
+        None: _keyboard_key,
+    },
+    STATE_CONSOLE: {
+        "KEY3": _console_close,
+        "UP": _console_scroll, "DOWN": _console_scroll,
+    },
+}
 
 
 # ---------- Main loop ----------
 
 def main():
-    global console_lines, console_scroll
-
-    font_big, font_small, font_label = load_fonts()
+    font_big, font_small, font_label = core_load_fonts()
 
     wifi_icons = {
         "on": load_icon(WIFI_ON_ICON_PATH, size=24),
@@ -958,345 +1593,130 @@ def main():
     if len(root_entries) == 0:
         logging.warning("No root menu entries found in %s", MENU_FS_DIR)
 
+    monitor = SystemMonitor(max_points=600, interval=1.0)
+
     # UI state
     state = STATE_SCREENSAVER
-    selected_root_index = 0
-
-    # List view state
-    current_dir = None
-    current_dir_name = ""
-    list_entries = []
-    selected_list_index = 0
-    list_scroll = 0
-
-    current_app = None
-    current_app_module = None
-    last_frame_time = time.time()
-
-    # Options menu state
-    selected_option_index = 0
-
-    # Keyboard state
-    keyboard = OnScreenKeyboard(disp, font_label)
-    keyboard_mode = None      # "rename" | "new_folder" | None
-    keyboard_target = None    # entry dict for rename (or None)
+    ctx = UIContext((font_big, font_small, font_label), monitor, root_entries,
+                    OnScreenKeyboard(hw, font_label))
+    last_frame_time = time.monotonic()
 
     # Seed initial button states
-    prev_button_states = {}
-    seed_pins = {
-        "UP": disp.GPIO_KEY_UP_PIN,
-        "DOWN": disp.GPIO_KEY_DOWN_PIN,
-        "LEFT": disp.GPIO_KEY_LEFT_PIN,
-        "RIGHT": disp.GPIO_KEY_RIGHT_PIN,
-        "CENTER": disp.GPIO_KEY_PRESS_PIN,
-        "KEY1": disp.GPIO_KEY1_PIN,
-        "KEY2": disp.GPIO_KEY2_PIN,
-        "KEY3": disp.GPIO_KEY3_PIN,
-    }
-    for name, pin in seed_pins.items():
-        prev_button_states[name] = disp.digital_read(pin)
-
-    last_input_time = time.time()
-    last_clock_draw = 0.0
-    menu_dirty = True
-    list_dirty = True
-    options_dirty = True
-    keyboard_dirty = True
-    console_dirty = True
-    monitor = SystemMonitor(max_points=600, interval=1.0)
+    prev_button_states = init_button_states(hw)
+
+    last_input_time = time.monotonic()
+    screensaver_drawn = None
+    drawn_state = None
+    console_drawn_len = 0
+    monitor.start()  # procfs читается в фоне, главный цикл только забирает замеры
+    sensors = SensorCache()
+    sensors.start()
 
     try:
         while True:
-            now = time.time()
+            # monotonic: dt and the idle timeout survive NTP steps of the wall clock
+            now = time.monotonic()
             dt = now - last_frame_time
             last_frame_time = now
-            monitor.sample(now)
+            monitor.sample()
 
-            # Input
+            # Input: one dict lookup picks the handler for (state, event)
             event, prev_button_states = read_buttons(prev_button_states)
             if event is not None:
                 last_input_time = now
                 logging.debug("Input event: %s", event)
 
-                if state == STATE_SCREENSAVER:
-                    state = STATE_MAIN_MENU
-                    menu_dirty = True
-
-                elif state == STATE_APP:
-                    if current_app is not None:
-                        result = current_app.on_event(event)
-                        if result == "exit":
-                            state = STATE_LIST_VIEW
-                            list_dirty = True
-                            current_app = None
-                            current_app_module = None
-
-                elif state == STATE_MAIN_MENU:
-                    if event == "KEY3":
-                        state = STATE_SCREENSAVER
-                    elif event in ("UP", "DOWN", "LEFT", "RIGHT"):
-                        if root_entries:
-                            rows = 2
-                            cols = 3
-                            idx = selected_root_index
-                            row = idx // cols
-                            col = idx % cols
-
-                            if event == "UP" and row > 0:
-                                row -= 1
-                            elif event == "DOWN" and row < rows - 1:
-                                row += 1
-                            elif event == "LEFT" and col > 0:
-                                col -= 1
-                            elif event == "RIGHT" and col < cols - 1:
-                                col += 1
-
-                            new_idx = row * cols + col
-                            if new_idx < len(root_entries) and new_idx != selected_root_index:
-                                selected_root_index = new_idx
-                                menu_dirty = True
-
-                    elif event == "CENTER":
-                        if 0 <= selected_root_index < len(root_entries):
-                            entry = root_entries[selected_root_index]
-                            current_dir = entry["path"]
-                            current_dir_name = entry["display_name"]
-                            list_entries = load_list_entries(current_dir)
-                            selected_list_index = 0
-                            list_scroll = 0
-                            state = STATE_LIST_VIEW
-                            list_dirty = True
-                            logging.info("Enter LIST_VIEW: %s", current_dir_name)
-
-                elif state == STATE_LIST_VIEW:
-                    if event == "KEY3":
-                        state = STATE_MAIN_MENU
-                        menu_dirty = True
-
-                    elif event in ("UP", "DOWN"):
-                        if list_entries:
-                            row_h = 30
-                            max_rows = (SCREEN_HEIGHT - 30) // row_h
-                            if event == "UP" and selected_list_index > 0:
-                                selected_list_index -= 1
-                                if selected_list_index < list_scroll:
-                                    list_scroll = selected_list_index
-                                list_dirty = True
-                            elif event == "DOWN" and selected_list_index < len(list_entries) - 1:
-                                selected_list_index += 1
-                                if selected_list_index >= list_scroll + max_rows:
-                                    list_scroll = selected_list_index - max_rows + 1
-                                list_dirty = True
-
-                    elif event == "CENTER":
-                        if list_entries:
-                            item = list_entries[selected_list_index]
-                            if item["type"] == "folder":
-                                current_dir = item["path"]
-                                current_dir_name = item["display_name"]
-                                list_entries = load_list_entries(current_dir)
-                                selected_list_index = 0
-                                list_scroll = 0
-                                list_dirty = True
-                                logging.info("Enter subfolder: %s", current_dir_name)
-                            elif item["type"] == "app":
-                                try:
-                                    with open(item["path"], "r", encoding="utf-8") as f:
-                                        meta = json.load(f)
-                                except Exception as e:
-                                    logging.warning("Failed to read app meta %s: %s", item["path"], e)
-                                    continue
-
-                                module_name = meta.get("module")
-                                if module_name:
-                                    app = load_app(module_name, hw, (font_big, font_small, font_label), monitor)
-                                    if app is not None:
-                                        current_app = app
-                                        current_app_module = module_name
-                                        if hasattr(current_app, "on_enter"):
-                                            current_app.on_enter()
-                                        state = STATE_APP
-                                    else:
-                                        logging.warning("Failed to init app %s", module_name)
-                                else:
-                                    exec_cmd = meta.get("exec")
-                                    if exec_cmd:
-                                        run_app(item)
-                                        state = STATE_CONSOLE
-                                        console_scroll = 0
-                                        console_dirty = True
-
-                    elif event == "KEY2":
-                        state = STATE_OPTIONS_MENU
-                        selected_option_index = 0
-                        options_dirty = True
-                        logging.info("Open OPTIONS_MENU")
-
-                elif state == STATE_OPTIONS_MENU:
-                    if event == "KEY3":
-                        state = STATE_LIST_VIEW
-                        list_dirty = True
-
-                    elif event in ("UP", "DOWN"):
-                        max_idx = len(OPTIONS_ITEMS) - 1
-                        if event == "UP" and selected_option_index > 0:
-                            selected_option_index -= 1
-                            options_dirty = True
-                        elif event == "DOWN" and selected_option_index < max_idx:
-                            selected_option_index += 1
-                            options_dirty = True
-
-                    elif event == "CENTER":
-                        choice = OPTIONS_ITEMS[selected_option_index]
-                        logging.info("OPTIONS choice: %s", choice)
-
-                        if choice == "Back":
-                            state = STATE_LIST_VIEW
-                            list_dirty = True
-
-                        elif choice == "Create folder":
-                            if current_dir:
-                                keyboard_mode = KB_MODE_NEW_FOLDER
-                                keyboard_target = None
-                                keyboard.start("New folder", initial_text="", max_len=64)
-                                state = STATE_KEYBOARD
-                                keyboard_dirty = True
-
-                        elif choice == "Delete":
-                            if list_entries:
-                                item = list_entries[selected_list_index]
-                                delete_entry(item)
-                                list_entries = load_list_entries(current_dir)
-                                if selected_list_index >= len(list_entries):
-                                    selected_list_index = max(0, len(list_entries) - 1)
-                                list_scroll = min(list_scroll, selected_list_index)
-                                state = STATE_LIST_VIEW
-                                list_dirty = True
-                            else:
-                                state = STATE_LIST_VIEW
-                                list_dirty = True
-
-                        elif choice == "Rename":
-                            if list_entries:
-                                keyboard_mode = KB_MODE_RENAME
-                                keyboard_target = list_entries[selected_list_index]
-                                initial = keyboard_target["display_name"]
-                                keyboard.start("Rename", initial_text=initial, max_len=64)
-                                state = STATE_KEYBOARD
-                                keyboard_dirty = True
-                                logging.info("Open KEYBOARD for rename: %s", initial)
-                            else:
-                                state = STATE_LIST_VIEW
-                                list_dirty = True
-
-                elif state == STATE_KEYBOARD:
-                    if event == "KEY3":
-                        keyboard_mode = None
-                        keyboard_target = None
-                        state = STATE_LIST_VIEW
-                        list_dirty = True
-
-                    elif event == "KEY1":
-                        keyboard.cycle_language()
-                        keyboard_dirty = True
-
-                    elif event == "KEY2":
-                        text = keyboard.text
-
-                        if keyboard_mode == KB_MODE_RENAME and keyboard_target and text is not None:
-                            rename_entry(keyboard_target, text)
-                        elif keyboard_mode == KB_MODE_NEW_FOLDER and current_dir and text is not None:
-                            create_folder_named(current_dir, text)
-
-                        if current_dir:
-                            list_entries = load_list_entries(current_dir)
-                            if selected_list_index >= len(list_entries):
-                                selected_list_index = max(0, len(list_entries) - 1)
-                            list_scroll = min(list_scroll, selected_list_index)
-
-                        keyboard_mode = None
-                        keyboard_target = None
-                        state = STATE_LIST_VIEW
-                        list_dirty = True
-
-                    else:
-                        action, text = keyboard.handle_event(event)
-                        if action == "redraw":
-                            keyboard_dirty = True
-                        elif action == "done":
-                            if keyboard_mode == KB_MODE_RENAME and keyboard_target and text is not None:
-                                rename_entry(keyboard_target, text)
-                            elif keyboard_mode == KB_MODE_NEW_FOLDER and current_dir and text is not None:
-                                create_folder_named(current_dir, text)
-
-                            if current_dir:
-                                list_entries = load_list_entries(current_dir)
-                                if selected_list_index >= len(list_entries):
-                                    selected_list_index = max(0, len(list_entries) - 1)
-                                list_scroll = min(list_scroll, selected_list_index)
-
-                            keyboard_mode = None
-                            keyboard_target = None
-                            state = STATE_LIST_VIEW
-                            list_dirty = True
-
-                elif state == STATE_CONSOLE:
-                    if event == "KEY3":
-                        state = STATE_LIST_VIEW
-                        list_dirty = True
-                    elif event == "UP":
-                        if console_scroll > 0:
-                            console_scroll -= 1
-                            console_dirty = True
-                    elif event == "DOWN":
-                        if console_scroll < max(0, len(console_lines) - 1):
-                            console_scroll += 1
-                            console_dirty = True
+                handlers = STATE_HANDLERS[state]
+                handler = handlers.get(event) or handlers.get(None)
+                if handler is not None:
+                    state = handler(ctx, event) or state
 
             # Idle timeout → screensaver
             if state != STATE_SCREENSAVER and (now - last_input_time) > IDLE_TIMEOUT:
+                if state == STATE_APP:
+                    ctx.leave_app()
                 state = STATE_SCREENSAVER
 
-            # Draw according to state
+            # Draw according to state; after any other screen the panel content
+            # is unknown, so the next menu frame goes out whole
+            if state != drawn_state:
+                _invalidate_shown()
+                ctx.keyboard.invalidate()
+                sensors.set_gps_probe(state == STATE_SCREENSAVER)
+                drawn_state = state
+                screensaver_drawn = None
+                ctx.dirty = True
+
             if state == STATE_SCREENSAVER:
-                if now - last_clock_draw >= 1.0:
-                    draw_screensaver(wifi_icons, bt_icons, gps_icons, font_big, font_small)
-                    last_clock_draw = now
+                # the screensaver frame depends only on sensors, the minute and
+                # the colon phase; nothing to compose while those stay the same
+                tm = time.localtime()  # wall clock is needed only here
+                screensaver_key = (sensors.wifi, sensors.bt, sensors.gps_state,
+                                   tm.tm_yday, tm.tm_hour, tm.tm_min, tm.tm_sec % 2)
+                if screensaver_key != screensaver_drawn:
+                    draw_screensaver(wifi_icons, bt_icons, gps_icons, font_big, font_small, sensors, tm)
+                    screensaver_drawn = screensaver_key
 
             elif state == STATE_MAIN_MENU:
-                if menu_dirty:
-                    draw_main_menu(root_entries, selected_root_index, font_label)
-                    menu_dirty = False
+                if ctx.dirty:
+                    draw_main_menu(ctx.root_entries, ctx.selected_root_index, font_label)
 
             elif state == STATE_LIST_VIEW:
-                if list_dirty:
-                    draw_list_view(list_entries, selected_list_index, list_scroll, current_dir_name, font_label)
-                    list_dirty = False
+                if ctx.dirty:
+                    draw_list_view(ctx.list_entries, ctx.selected_list_index, ctx.list_scroll,
+                                   ctx.current_dir_name, font_label)
 
             elif state == STATE_OPTIONS_MENU:
-                if options_dirty:
-                    draw_options_menu(selected_option_index, font_label)
-                    options_dirty = False
+                if ctx.dirty:
+                    draw_options_menu(ctx.selected_option_index, font_label)
 
             elif state == STATE_KEYBOARD:
-                if keyboard_dirty:
-                    keyboard.draw()
-                    keyboard_dirty = False
+                if ctx.dirty:
+                    ctx.keyboard.draw()
 
             elif state == STATE_APP:
-                if current_app is not None:
-                    current_app.update(dt)
-                    current_app.draw()
+                if ctx.current_app is not None:
+                    ctx.current_app.update(dt)
+                    ctx.current_app.draw()
 
             elif state == STATE_CONSOLE:
-                if console_dirty:
+                # the .app command may still be printing: new lines → redraw
+                if ctx.dirty or len(console_lines) != console_drawn_len:
+                    console_drawn_len = len(console_lines)
                     draw_console(hw, font_label, console_lines, console_scroll)
-                    console_dirty = False
+            ctx.dirty = False
 
-            time.sleep(0.05)
+            # sleep until the next deadline, or until a button edge / new console
+            # output: the screensaver waits for the next whole second (colon
+            # blink), an app for its frame interval, other screens only change
+            # on input and otherwise sleep until the idle timeout
+            if state == STATE_SCREENSAVER:
+                wall = time.time()
+                timeout = int(wall) + 1 - wall
+            elif state == STATE_APP:
+                # counted from the start of this pass, so update/draw time is
+                # part of the frame; faster than FRAME_S is allowed here
+                timeout = now + getattr(ctx.current_app, "frame_interval", FRAME_S) - time.monotonic()
+            else:
+                timeout = last_input_time + IDLE_TIMEOUT - time.monotonic()
+            if state != STATE_APP:
+                timeout = max(FRAME_S, timeout)
+            # without edge callbacks buttons are polled; a level waiting out
+            # its debounce is committed right at its deadline
+            if not hw.edge_wakeup:
+                timeout = min(timeout, FRAME_S)
+            timeout = max(0.0, timeout)
+            deadline = next_deadline(prev_button_states)
+            if deadline is not None:
+                timeout = min(timeout, max(0.0, deadline - time.monotonic()))
+            hw.wait_input(timeout)
 
     except KeyboardInterrupt:
-        disp.clear()
+        ctx.leave_app()
+        stop_app()
+        sensors.stop()
+        monitor.close()
+        hw.clear()
         logging.info("Exit by KeyboardInterrupt")
 
 
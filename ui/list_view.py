@@ -8,7 +8,6 @@ def draw_list_view(hw, fonts, entries, selected_index, path_stack):
 
     # заголовок — текущая папка
     header = path_stack[-1]["display_name"] if path_stack else "Root"
-    w,h = draw.textsize(header, font=font_label)
     draw.text((4, 2), header, font=font_label, fill=(200,200,200))
 
     draw.line([(0,18),(hw.W,18)], fill=(80,80,80), width=1)
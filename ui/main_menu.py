@@ -1,5 +1,7 @@
 from PIL import Image, ImageDraw
 
+from core.fonts import measure
+
 def draw_main_menu(hw, fonts, categories, selected_index):
     font_big, font_small, font_label = fonts
 
@@ -26,7 +28,7 @@ def draw_main_menu(hw, fonts, categories, selected_index):
 
         # текст по центру
         name = cat["display_name"]
-        w, h = draw.textsize(name, font=font_label)
+        w, h = measure(name, font_label)
         draw.text((x + (cell_w - w)//2, y + (cell_h - h)//2), name, font=font_label, fill=(255,255,255))
 
     hw.show(image)
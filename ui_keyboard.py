@@ -3,9 +3,42 @@
 
 from PIL import Image, ImageDraw
 
+from core.fonts import measure, paste_text, render_mask
+
 SCREEN_WIDTH = 240
 SCREEN_HEIGHT = 240
 
+# Top input field
+INPUT_H = 40
+BOX_X0 = 4
+BOX_Y0 = 4
+BOX_X1 = SCREEN_WIDTH - 4
+BOX_Y1 = BOX_Y0 + INPUT_H
+MAX_CHARS_DISPLAY = 18  # tail of the text shown if longer
+
+# Keyboard area
+KB_MARGIN_X = 4
+KB_TOP = BOX_Y1 + 6
+KB_BOTTOM = SCREEN_HEIGHT - 4
+KB_AVAILABLE_W = SCREEN_WIDTH - KB_MARGIN_X * 2
+
+BOX_FILL = (25, 25, 25)
+BOX_OUTLINE = (80, 80, 80)
+TEXT_FILL = (220, 220, 220)
+INDICATOR_FILL = (150, 150, 150)
+KEY_FILL = (35, 35, 35)
+KEY_OUTLINE = (80, 80, 80)
+KEY_FILL_SEL = (80, 80, 80)
+KEY_OUTLINE_SEL = (255, 255, 255)
+KEY_LABEL = (255, 255, 255)
+
+# joystick event -> (row step, column step)
+_NAV = {"UP": (-1, 0), "DOWN": (1, 0), "LEFT": (0, -1), "RIGHT": (0, 1)}
+
+# system row: [mode_switch, Shift, space, ⌫, return]
+_SYS_ROW_LETTERS = ("123", "Shift", "space", "⌫", "return")
+_SYS_ROW_NUMSYM = ("ABC", "Shift", "space", "⌫", "return")
+
 
 class OnScreenKeyboard:
     """
@@ -24,14 +57,36 @@ class OnScreenKeyboard:
       - handle_event(event) -> (action, text_or_none)
           action: "redraw" | "done" | None
       - draw()
+      - invalidate()  (panel was used by another screen)
       - cycle_language()
       - .text contains current value
     """
 
-    def __init__(self, disp, font_label):
-        self.disp = disp
+    # (mode, shift) -> layout indicator in the input box
+    _INDICATORS = {
+        ("num_sym", False): "123",
+        ("num_sym", True): "123",
+        ("letters_en", False): "EN",
+        ("letters_en", True): "EN↑",
+        ("letters_ru", False): "RU",
+        ("letters_ru", True): "RU↑",
+    }
+
+    def __init__(self, hw, font_label):
+        self.hw = hw
+        self.disp = hw.disp
         self.font = font_label
 
+        # one canvas for every redraw instead of a new Image per key press
+        self._image = Image.new("RGB", (SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0, 0))
+        self._draw = ImageDraw.Draw(self._image)
+        # (mode, shift) -> (base image, key rects), see _get_base()
+        self._bases = {}
+        # (w, h, fill, outline) -> (tile, mask), see _key_tile()
+        self._tiles = {}
+        # (mode, shift) -> (label rows, row lengths), see _get_layout()
+        self._rows_cache = {}
+
         # Text / prompt
         self.prompt = "Text"
         self.text = ""
@@ -43,25 +98,37 @@ class OnScreenKeyboard:
         self.cursor_row = 0
         self.cursor_col = 0
 
-        # Base layouts (lowercase for letters, shift will upper them)
-        self.letters_en_rows = [
-            list("qwertyuiop"),
-            list("asdfghjkl"),
-            list("zxcvbnm"),
-        ]
+        # Base layouts (lowercase for letters, shift will upper them);
+        # rows are immutable, a string is a row of one-char labels
+        self.letters_en_rows = (
+            "qwertyuiop",
+            "asdfghjkl",
+            "zxcvbnm",
+        )
 
         # Simple Russian layout (QWERTY-like)
-        self.letters_ru_rows = [
-            list("йцукенгшщз"),
-            list("фывапролд"),
-            list("ячсмитьбю"),
-        ]
-
-        self.num_rows = [
-            list("1234567890"),
-            ["-", "_", "@", ".", ",", "?"],
-            ["!", "?", ":", ";", "(", ")"],
-        ]
+        self.letters_ru_rows = (
+            "йцукенгшщз",
+            "фывапролд",
+            "ячсмитьбю",
+        )
+
+        self.num_rows = (
+            "1234567890",
+            ("-", "_", "@", ".", ",", "?"),
+            ("!", "?", ":", ";", "(", ")"),
+        )
+
+        # label -> (w, h); key labels are a fixed set, see _warm_size_cache()
+        self._size_cache = {}
+        self._warm_size_cache()
+
+        # (self.text, tail height, tail mask, mask offset) as of the last draw()
+        self._display = (None, 0, None, (0, 0))
+
+        # (mode, shift, text, cursor_row, cursor_col) of the frame on the panel,
+        # None -> next draw() sends the whole frame
+        self._shown = None
 
     # ---------- Public API ----------
 
@@ -76,6 +143,11 @@ class OnScreenKeyboard:
         self.shift = False
         self.cursor_row = 0
         self.cursor_col = 0
+        self.invalidate()
+
+    def invalidate(self):
+        """Panel content is unknown (another screen was shown): next draw() sends the whole frame."""
+        self._shown = None
 
     def cycle_language(self):
         """
@@ -98,26 +170,22 @@ class OnScreenKeyboard:
           ("done", text)   -> user pressed on-screen "return"
           (None, None)     -> nothing important
         """
-        rows = self._get_layout_rows()
-
-        # Navigation
-        if event in ("UP", "DOWN", "LEFT", "RIGHT"):
-            max_row = len(rows) - 1
-
-            if event == "UP" and self.cursor_row > 0:
-                self.cursor_row -= 1
-            elif event == "DOWN" and self.cursor_row < max_row:
-                self.cursor_row += 1
-            elif event == "LEFT" and self.cursor_col > 0:
-                self.cursor_col -= 1
-            elif event == "RIGHT":
-                if self.cursor_col < len(rows[self.cursor_row]) - 1:
-                    self.cursor_col += 1
-
-            # Clamp column if moving to shorter row
-            if self.cursor_col >= len(rows[self.cursor_row]):
-                self.cursor_col = len(rows[self.cursor_row]) - 1
-
+        # Navigation: only row lengths are needed, not the labels
+        nav = _NAV.get(event)
+        if nav is not None:
+            row_lens = self._get_layout()[1]
+            dr, dc = nav
+
+            row = self.cursor_row + dr
+            if not 0 <= row < len(row_lens):
+                row = self.cursor_row
+            # Clamp column to the grid (also when moving to a shorter row)
+            col = min(max(self.cursor_col + dc, 0), row_lens[row] - 1)
+
+            # Pushed against the edge of the grid: nothing to redraw
+            if (row, col) == (self.cursor_row, self.cursor_col):
+                return None, None
+            self.cursor_row, self.cursor_col = row, col
             return "redraw", None
 
         # Key press
@@ -148,8 +216,9 @@ class OnScreenKeyboard:
                 else:
                     self.mode = "num_sym"
                 # After mode change, keep cursor in system row on same key index
-                self.cursor_row = min(self.cursor_row, len(self._get_layout_rows()) - 1)
-                self.cursor_col = min(self.cursor_col, len(self._get_layout_rows()[self.cursor_row]) - 1)
+                row_lens = self._get_layout()[1]
+                self.cursor_row = min(self.cursor_row, len(row_lens) - 1)
+                self.cursor_col = min(self.cursor_col, row_lens[self.cursor_row] - 1)
                 return "redraw", None
 
             if label == "Shift":
@@ -165,57 +234,100 @@ class OnScreenKeyboard:
 
     def draw(self):
         """Draw keyboard and current text on display."""
-        width = SCREEN_WIDTH
-        height = SCREEN_HEIGHT
+        base, rects = self._get_base()
+
+        image, draw = self._image, self._draw
+        image.paste(base)
+
+        # Draw current text (tail if too long); the tail is measured and
+        # rasterized only after an edit, not on every cursor move
+        src, text_h, mask, (dx, dy) = self._display
+        if src is not self.text:
+            src = self.text
+            display_text = src if len(src) <= MAX_CHARS_DISPLAY else src[-MAX_CHARS_DISPLAY:]
+            text_h = self._text_size(draw, display_text)[1]
+            # own mask, not core.fonts.text_mask: typed strings would evict key labels
+            mask, (dx, dy) = render_mask(display_text, self.font)
+            self._display = (src, text_h, mask, (dx, dy))
+
+        text_x = BOX_X0 + 8
+        text_y = BOX_Y0 + (INPUT_H - text_h) // 2
+        image.paste(TEXT_FILL, (text_x + dx, text_y + dy), mask)
+
+        # Layout indicator in top-right corner
+        indicator = self._get_layout_indicator()
+        ind_w, ind_h = self._text_size(draw, indicator)
+        ind_x = BOX_X1 - ind_w - 6
+        ind_y = BOX_Y0 + (INPUT_H - ind_h) // 2
+        paste_text(image, (ind_x, ind_y), indicator, self.font, INDICATOR_FILL)
+
+        # Only the cursor row differs from the cached grid. Wide labels of the
+        # system row spill over neighbouring keys, so the row is cleared and
+        # repainted left to right instead of patching the selected key alone
+        r, c = self.cursor_row, self.cursor_col
+        if r < len(rects):
+            _, (_, y0, _, y1), _ = rects[r][0]
+            image.paste((0, 0, 0), (0, y0, SCREEN_WIDTH, y1 + 1))
+            for i, key in enumerate(rects[r]):
+                if i == c:
+                    self._draw_key(image, draw, key, KEY_FILL_SEL, KEY_OUTLINE_SEL)
+                else:
+                    self._draw_key(image, draw, key, KEY_FILL, KEY_OUTLINE)
+
+        # hw.show() packs RGB565 straight into panel orientation (270°),
+        # so no rotated copy of the frame is made here
+        self._push(image, rects, (BOX_X0, BOX_Y0, BOX_X1 + 1, BOX_Y1 + 1))
+
+    def _push(self, image, rects, input_box):
+        """
+        Send the frame to the panel: whole frame after start() or a layout
+        switch, otherwise only the input box and the cursor row(s) that changed.
+        """
+        shown = self._shown
+        state = (self.mode, self.shift, self.text, self.cursor_row, self.cursor_col)
+        self._shown = state
+        if shown is None or shown[:2] != state[:2]:
+            self.hw.show(image)
+            return
+
+        if shown[2] != state[2]:
+            self.hw.show_region(image, input_box)
+        if shown[3:] != state[3:]:
+            for r in {shown[3], state[3]}:
+                if r < len(rects):
+                    _, (_, y0, _, y1), _ = rects[r][0]
+                    self.hw.show_region(image, (0, y0, SCREEN_WIDTH, y1 + 1))
+
+    def _get_base(self):
+        """
+        Static part of the frame for current (mode, shift): input box and
+        unselected key grid. Built once, then only copied on every redraw.
+        Returns (image, rects),
+        rects[r][c] = (label, (x0, y0, x1, y1), (label_x, label_y)).
+        """
+        cache_key = (self.mode, self.shift)
+        cached = self._bases.get(cache_key)
+        if cached is not None:
+            return cached
 
-        image = Image.new("RGB", (width, height), (0, 0, 0))
+        image = Image.new("RGB", (SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0, 0))
         draw = ImageDraw.Draw(image)
 
         # Top input field
-        top_margin = 4
-        input_h = 40
-        box_x0 = 4
-        box_y0 = top_margin
-        box_x1 = width - 4
-        box_y1 = box_y0 + input_h
-
         draw.rounded_rectangle(
-            [(box_x0, box_y0), (box_x1, box_y1)],
+            [(BOX_X0, BOX_Y0), (BOX_X1, BOX_Y1)],
             radius=10,
-            fill=(25, 25, 25),
-            outline=(80, 80, 80),
+            fill=BOX_FILL,
+            outline=BOX_OUTLINE,
             width=1,
         )
 
-        # Draw current text (tail if too long)
-        display_text = self.text
-        max_chars_display = 18
-        if len(display_text) > max_chars_display:
-            display_text = display_text[-max_chars_display:]
-
-        text_w, text_h = self._text_size(draw, display_text)
-        text_x = box_x0 + 8
-        text_y = box_y0 + (input_h - text_h) // 2
-        draw.text((text_x, text_y), display_text, font=self.font, fill=(220, 220, 220))
-
-        # Layout indicator in top-right corner
-        indicator = self._get_layout_indicator()
-        ind_w, ind_h = self._text_size(draw, indicator)
-        ind_x = box_x1 - ind_w - 6
-        ind_y = box_y0 + (input_h - ind_h) // 2
-        draw.text((ind_x, ind_y), indicator, font=self.font, fill=(150, 150, 150))
-
         # Keyboard area
-        kb_margin_x = 4
-        kb_margin_bottom = 4
-        kb_top = box_y1 + 6
-        kb_bottom = height - kb_margin_bottom
-        kb_height = kb_bottom - kb_top
-
         rows = self._get_layout_rows()
         rows_count = len(rows)
-        row_h = kb_height // rows_count
+        row_h = (KB_BOTTOM - KB_TOP) // rows_count
 
+        rects = []
         for r, row_keys in enumerate(rows):
             # Weights: letters = 1 each, system row = custom weights
             weights = []
@@ -233,69 +345,104 @@ class OnScreenKeyboard:
                         weights.append(1.0)
 
             total_w = sum(weights)
-            available_w = width - kb_margin_x * 2
-            x = kb_margin_x
-            y0 = kb_top + r * row_h
+            x = KB_MARGIN_X
+            y0 = KB_TOP + r * row_h
             y1 = y0 + row_h - 4  # a bit of vertical margin
 
+            row_rects = []
             for c, label in enumerate(row_keys):
-                w = int(available_w * (weights[c] / total_w))
+                w = int(KB_AVAILABLE_W * (weights[c] / total_w))
                 key_x0 = x + 2
                 key_x1 = x + w - 4
-
-                # Rounded button
-                selected = (r == self.cursor_row and c == self.cursor_col)
-                if selected:
-                    fill_color = (80, 80, 80)
-                    outline_color = (255, 255, 255)
-                else:
-                    fill_color = (35, 35, 35)
-                    outline_color = (80, 80, 80)
-
-                draw.rounded_rectangle(
-                    [(key_x0, y0), (key_x1, y1)],
-                    radius=10,
-                    fill=fill_color,
-                    outline=outline_color,
-                    width=1,
-                )
-
-                # Label
-                label_text = label
-                label_w, label_h = self._text_size(draw, label_text)
+                label_w, label_h = self._text_size(draw, label)
                 label_x = key_x0 + (key_x1 - key_x0 - label_w) // 2
                 label_y = y0 + (y1 - y0 - label_h) // 2
-                draw.text((label_x, label_y), label_text, font=self.font, fill=(255, 255, 255))
-
+                key = (label, (key_x0, y0, key_x1, y1), (label_x, label_y))
+                self._draw_key(image, draw, key, KEY_FILL, KEY_OUTLINE)
+                row_rects.append(key)
                 x += w
+            rects.append(row_rects)
+
+        cached = self._bases[cache_key] = (image, rects)
+        return cached
+
+    def _draw_key(self, image, draw, key, fill_color, outline_color):
+        label, (key_x0, y0, key_x1, y1), label_xy = key
 
-        # Rotate 270° for Waveshare ST7789
-        im_r = image.rotate(270)
-        self.disp.ShowImage(im_r)
+        # Rounded button: pre-rendered tile, the mask keeps corners transparent
+        tile, mask = self._key_tile(key_x1 - key_x0 + 1, y1 - y0 + 1, fill_color, outline_color)
+        image.paste(tile, (key_x0, y0), mask)
+
+        # Label, position precomputed in _get_base();
+        # key labels never change: glyph masks come from the core.fonts cache
+        paste_text(image, label_xy, label, self.font, KEY_LABEL)
+
+    def _key_tile(self, w, h, fill_color, outline_color):
+        """Rounded key of size w x h as (RGB tile, L mask), rendered once."""
+        cache_key = (w, h, fill_color, outline_color)
+        cached = self._tiles.get(cache_key)
+        if cached is not None:
+            return cached
+
+        tile = Image.new("RGB", (w, h), (0, 0, 0))
+        ImageDraw.Draw(tile).rounded_rectangle(
+            [(0, 0), (w - 1, h - 1)],
+            radius=10,
+            fill=fill_color,
+            outline=outline_color,
+            width=1,
+        )
+        mask = Image.new("L", (w, h), 0)
+        ImageDraw.Draw(mask).rounded_rectangle(
+            [(0, 0), (w - 1, h - 1)], radius=10, fill=255, outline=255, width=1
+        )
+        cached = self._tiles[cache_key] = (tile, mask)
+        return cached
 
     # ---------- Internal helpers ----------
 
     def _text_size(self, draw: ImageDraw.ImageDraw, text: str):
+        size = self._size_cache.get(text)
+        if size is not None:
+            return size
         if not text:
             return 0, 0
-        bbox = draw.textbbox((0, 0), text, font=self.font)
-        return bbox[2] - bbox[0], bbox[3] - bbox[1]
+        # typed text goes through the shared bounded cache in core.fonts
+        return measure(text, self.font)
+
+    def _warm_size_cache(self):
+        """Sizes of every key label and indicator, measured once per instance."""
+        labels = set(_SYS_ROW_LETTERS + _SYS_ROW_NUMSYM)
+        labels.update(self._INDICATORS.values())
+        for base_rows in (self.letters_en_rows, self.letters_ru_rows, self.num_rows):
+            for row in base_rows:
+                for ch in row:
+                    labels.update((ch, ch.lower(), ch.upper()))
+        for label in labels:
+            self._size_cache[label] = measure(label, self.font)
 
     def _get_layout_indicator(self) -> str:
         """Return short indicator like EN, EN↑, RU, RU↑, 123."""
-        if self.mode == "num_sym":
-            return "123"
-        if self.mode == "letters_en":
-            return "EN↑" if self.shift else "EN"
-        if self.mode == "letters_ru":
-            return "RU↑" if self.shift else "RU"
-        return "?"
+        return self._INDICATORS.get((self.mode, self.shift), "?")
 
     def _get_layout_rows(self):
         """
-        Return list of rows, each row is list of labels (strings).
+        Return tuple of rows, each row is a tuple of labels (strings).
         Last row is the system row: [mode_switch, Shift, space, ⌫, return]
+        Built once per (mode, shift); callers must not modify the lists.
         """
+        return self._get_layout()[0]
+
+    def _get_layout(self):
+        """(rows, row lengths) for current (mode, shift)."""
+        cache_key = (self.mode, self.shift)
+        layout = self._rows_cache.get(cache_key)
+        if layout is None:
+            rows = self._build_layout_rows()
+            layout = self._rows_cache[cache_key] = (rows, tuple(len(row) for row in rows))
+        return layout
+
+    def _build_layout_rows(self):
         if self.mode == "letters_en":
             base_rows = self.letters_en_rows
         elif self.mode == "letters_ru":
@@ -307,25 +454,16 @@ class OnScreenKeyboard:
 
         # 3 main rows
         for base_row in base_rows:
-            row = []
-            for ch in base_row:
-                if self.mode.startswith("letters"):
-                    row.append(ch.upper() if self.shift else ch.lower())
-                else:
-                    # num_sym: no shift effect
-                    row.append(ch)
-            rows.append(row)
+            if self.mode.startswith("letters"):
+                rows.append(tuple(base_row.upper() if self.shift else base_row.lower()))
+            else:
+                # num_sym: no shift effect
+                rows.append(tuple(base_row))
 
         # System row
-        if self.mode == "num_sym":
-            mode_label = "ABC"
-        else:
-            mode_label = "123"
-
-        system_row = [mode_label, "Shift", "space", "⌫", "return"]
-        rows.append(system_row)
+        rows.append(_SYS_ROW_NUMSYM if self.mode == "num_sym" else _SYS_ROW_LETTERS)
 
-        return rows
+        return tuple(rows)
 
     def _get_current_key_label(self):
         rows = self._get_layout_rows()